@@ -0,0 +1,163 @@
+"""
+Benchmark: checkpoint bytes stored per analysis session.
+
+Runs full sessions through `build_ad_graph` with a synthetic article and
+reports how many bytes the in-memory checkpointer holds afterwards
+(checkpoints, channel blobs and pending writes). LLM calls are replaced by
+canned responses and the near-duplicate index is kept in memory, so the
+benchmark is offline and deterministic.
+
+`--baseline` reproduces the layout before the article store: the graph is
+resumed with the article text itself, which stays in the state, and every
+node returns the whole state instead of only the keys it changes.
+
+NLTK runs for real, so its data must be installed (see the Dockerfile);
+`--stub-nltk` swaps in a whitespace tokenizer instead. Keywords are a few
+short words either way, so the byte counts barely change.
+
+Usage:
+    python -m benchmarks.checkpoint_bytes [--kb 50] [--sessions 5] [--baseline] [--stub-nltk]
+"""
+
+import argparse
+import functools
+from contextlib import ExitStack
+from unittest import mock
+
+from langgraph.types import Command
+
+import blog_generator.blog_details as blog_details_module
+from data.article_store import InMemoryArticleStore
+from data.near_duplicate import NearDuplicateIndex
+from data_validator.data_valid import BlogDetails
+from graph_builder.build_graph import build_ad_graph
+from llm_models.llm import LLMHandler
+
+NODES = ["ask_blog_details", "find_near_duplicate", "collect_blog_details", "get_keywords",
+         "generate_summary"]
+
+
+class _Summary:
+    content = "A synthetic article about AI in fashion retail."
+
+
+def _fake_invoke(self, prompt, task=None, structured=False, priority=None):
+    if structured:
+        return BlogDetails(title="AI in Fashion", topics=["AI", "Fashion"], sentiment="positive")
+    return _Summary()
+
+
+def _typed_size(value) -> int:
+    """Bytes of a serde `(type, bytes)` tuple (or 0 for anything else)."""
+    if isinstance(value, tuple) and len(value) == 2 and isinstance(value[1], (bytes, bytearray)):
+        return len(value[1])
+    return 0
+
+
+def checkpoint_bytes(saver, thread_id: str) -> int:
+    """Total serialized bytes the InMemorySaver holds for one thread."""
+    total = 0
+    for checkpoints in saver.storage[thread_id].values():
+        for checkpoint, metadata, _parent in checkpoints.values():
+            total += _typed_size(checkpoint) + _typed_size(metadata)
+    for key, value in saver.blobs.items():
+        if key[0] == thread_id:
+            total += _typed_size(value)
+    for key, writes in saver.writes.items():
+        if key[0] == thread_id:
+            for write in writes.values():
+                total += _typed_size(write[2])
+    return total
+
+
+class InlineArticleStore:
+    """Baseline "store": the reference is the article text itself."""
+
+    def put(self, text: str) -> str:
+        return text
+
+    def get(self, ref):
+        return ref or ""
+
+
+def _return_full_state(node):
+    """Baseline node: return the whole state, not just the keys it changes."""
+
+    @functools.wraps(node)
+    def wrapper(self, state, *args, **kwargs):
+        return {**state, **(node(self, state, *args, **kwargs) or {})}
+
+    return wrapper
+
+
+class _StubStopwords:
+    @staticmethod
+    def words(language):
+        return ["the", "is", "how", "their", "are"]
+
+
+def make_article(kb: int) -> str:
+    sentence = "Artificial intelligence is reshaping how fashion retailers plan their collections. "
+    return (sentence * (kb * 1024 // len(sentence) + 1))[: kb * 1024]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--kb", type=int, default=50, help="article size in KB")
+    parser.add_argument("--sessions", type=int, default=5, help="sessions to run")
+    parser.add_argument(
+        "--baseline", action="store_true", help="keep the full text in state (old layout)"
+    )
+    parser.add_argument(
+        "--stub-nltk", action="store_true", help="whitespace tokenizer instead of NLTK data"
+    )
+    args = parser.parse_args()
+
+    article = make_article(args.kb)
+    store = InlineArticleStore() if args.baseline else InMemoryArticleStore()
+
+    with ExitStack() as stack:
+        patches = [
+            mock.patch.object(LLMHandler, "__init__", lambda self: None),
+            mock.patch.object(LLMHandler, "invoke", _fake_invoke),
+            mock.patch.object(blog_details_module, "article_store", store),
+            mock.patch.object(
+                blog_details_module, "near_duplicate_index", NearDuplicateIndex(persist=False)
+            ),
+        ]
+        if args.baseline:
+            patches += [
+                mock.patch.object(
+                    blog_details_module.BlogDetails,
+                    name,
+                    _return_full_state(getattr(blog_details_module.BlogDetails, name)),
+                )
+                for name in NODES
+            ]
+        if args.stub_nltk:
+            patches += [
+                mock.patch("nltk.word_tokenize", lambda text: text.split()),
+                mock.patch("nltk.pos_tag", lambda words: [(w, "NN") for w in words]),
+                mock.patch.object(blog_details_module, "stopwords", _StubStopwords),
+            ]
+        for patch in patches:
+            stack.enter_context(patch)
+
+        graph = build_ad_graph()
+        sizes = []
+        for i in range(args.sessions):
+            config = {"configurable": {"thread_id": f"bench-{i}"}}
+            graph.invoke({}, config=config)
+            graph.invoke(Command(resume=store.put(article)), config=config)
+            sizes.append(checkpoint_bytes(graph.checkpointer, f"bench-{i}"))
+
+    per_session = sum(sizes) / len(sizes)
+    layout = "baseline (text in state)" if args.baseline else "article store"
+    print(f"layout:                   {layout}")
+    print(f"article size:             {len(article):>10,} bytes")
+    print(f"checkpoint bytes/session: {per_session:>10,.0f} bytes")
+    print(f"ratio to article size:    {per_session / len(article):>10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
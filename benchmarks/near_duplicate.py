@@ -0,0 +1,119 @@
+"""
+Benchmark: near-duplicate lookup precision and speed.
+
+Builds an in-memory NearDuplicateIndex, pads it with random signatures to
+reach `--docs` entries, then queries it with:
+- edited copies of indexed articles (new byline, tracking footer, a few
+  words changed) that should match their source, and
+- articles that share about half their text with an indexed one, plus
+  unrelated articles, none of which should match.
+
+Usage:
+    python -m benchmarks.near_duplicate [--docs 1000000] [--articles 500] [--threshold 0.8]
+"""
+
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+
+from data.near_duplicate import NearDuplicateIndex
+
+VOCABULARY = [f"word{i}" for i in range(20000)]
+
+
+def make_article(rng: random.Random, words: int = 800) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def syndicate(rng: random.Random, article: str, changed: float = 0.01) -> str:
+    """An edited copy: new byline, tracking footer and a few words replaced."""
+    words = article.split()
+    for i in rng.sample(range(len(words)), int(len(words) * changed)):
+        words[i] = rng.choice(VOCABULARY)
+    return (
+        f"By {rng.choice(VOCABULARY)} {rng.choice(VOCABULARY)}, Syndicated Press. "
+        + " ".join(words)
+        + f" Read more at example.com/?utm_source={rng.choice(VOCABULARY)}"
+    )
+
+
+def rewrite_half(rng: random.Random, article: str) -> str:
+    """A related but different article: the second half is new text."""
+    words = article.split()
+    return " ".join(words[: len(words) // 2]) + " " + make_article(rng, len(words) // 2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--docs", type=int, default=1_000_000, help="index size")
+    parser.add_argument("--articles", type=int, default=500, help="labeled articles")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Jaccard threshold")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index = NearDuplicateIndex(threshold=args.threshold, max_documents=args.docs, persist=False)
+    print(f"LSH layout: {index.bands} bands x {index.rows} rows")
+
+    # Random signatures behave like unrelated documents
+    started_at = time.perf_counter()
+    np_rng = np.random.default_rng(args.seed)
+    for i in range(max(0, args.docs - args.articles)):
+        index.add(f"filler-{i}", np_rng.integers(0, 2**32, index.hasher.num_perm, dtype=np.uint32))
+
+    articles = [make_article(rng) for _ in range(args.articles)]
+    signature_times = []
+    for i, article in enumerate(articles):
+        t = time.perf_counter()
+        signature = index.hasher.signature(article)
+        signature_times.append(time.perf_counter() - t)
+        index.add(f"article-{i}", signature)
+    print(f"index size: {len(index):,} documents (built in {time.perf_counter() - started_at:.1f}s)")
+
+    queries = [(syndicate(rng, a), f"article-{i}") for i, a in enumerate(articles)]
+    queries += [(rewrite_half(rng, a), None) for a in articles]
+    queries += [(make_article(rng), None) for _ in articles]
+
+    true_positives = false_positives = false_negatives = 0
+    lookup_times = []
+    for text, expected in queries:
+        signature = index.hasher.signature(text)
+        t = time.perf_counter()
+        match = index.query(signature)
+        lookup_times.append(time.perf_counter() - t)
+
+        found = match[0] if match else None
+        if expected and found == expected:
+            true_positives += 1
+        elif expected:
+            false_negatives += 1
+        if found and found != expected:
+            false_positives += 1
+
+    lookups_ms = np.array(lookup_times) * 1000
+    precision = true_positives / max(1, true_positives + false_positives)
+    recall = true_positives / max(1, true_positives + false_negatives)
+    print(f"precision: {precision:.3f}   recall: {recall:.3f}")
+    print(
+        f"lookup ms: mean {lookups_ms.mean():.3f}   p50 {np.percentile(lookups_ms, 50):.3f}"
+        f"   p99 {np.percentile(lookups_ms, 99):.3f}"
+    )
+    print(f"signature ms (800-word article): mean {np.mean(signature_times) * 1000:.2f}")
+    print(f"index memory: ~{index_memory_bytes(index) / len(index):,.0f} bytes/document")
+
+
+def index_memory_bytes(index: NearDuplicateIndex) -> int:
+    """Approximate memory held by the index's signatures, buckets and keys."""
+    total = index._signatures.nbytes + sys.getsizeof(index._positions)
+    total += sum(sys.getsizeof(key) for key in index._positions)
+    for bucket in index._buckets:
+        total += sys.getsizeof(bucket)
+        total += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in bucket.items())
+    return total
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,16 @@
+from data.article_store import article_store
+from data.near_duplicate import near_duplicate_index
 from data_validator.data_valid import BlogBuilderState
+from helper_functions.tracing import traced
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import END
 from langgraph.types import interrupt
-from llm_models.llm import LLMHandler
+from llm_models.llm import (
+    LLMHandler,
+    PRIORITY_INTERACTIVE,
+    TASK_EXTRACTION,
+    TASK_SUMMARY,
+)
 import nltk
 from collections import Counter
 from nltk.corpus import stopwords
@@ -12,39 +22,99 @@ class BlogDetails:
 
     Responsibilities:
     - Ask the user for input text (blog/article).
+    - Reuse the analysis of a near-duplicate article when one exists (MinHash + LSH).
     - Use LLM to extract title, topics, and sentiment.
     - Use LLM to generate a short summary.
     - Use NLTK to extract top frequent keywords (nouns).
+
+    LLM calls go through the shared scheduler; the priority is read from
+    `config["configurable"]["priority"]` (interactive by default).
+
+    The article text lives in the article store, not in the graph state, and
+    each node returns only the keys it changes so checkpoints stay small.
     """
 
+    @staticmethod
+    def _priority(config: RunnableConfig) -> int:
+        """Return the LLM scheduling priority for this run."""
+        return (config or {}).get("configurable", {}).get("priority", PRIORITY_INTERACTIVE)
+
+    @staticmethod
+    def _article(state: BlogBuilderState) -> str:
+        """Load the session's article text from the article store ("" if none)."""
+        return article_store.get(state.get("article_ref"))
+
+    @traced("node.ask_blog_details")
     def ask_blog_details(self, state: BlogBuilderState) -> BlogBuilderState:
         """
         Interrupt the workflow to request blog/article input from the user.
 
+        Callers put the article into `article_store` and resume with the returned
+        reference, so the text itself never enters the checkpoints.
+
         Args:
             state (BlogBuilderState): Current state of the workflow.
 
         Returns:
-            BlogBuilderState: Updated state with 'user_input' field set after user response.
+            BlogBuilderState: Update with 'article_ref' pointing at the stored article
+            (None if the user sent nothing).
         """
-        user_input = interrupt(
+        article_ref = interrupt(
             "Kindly drop the article or blog post you want to generate details for."
         )
-        state["user_input"] = user_input
-        return state
+        return {"article_ref": article_ref or None}
 
-    def collect_blog_details(self, state: BlogBuilderState) -> BlogBuilderState:
+    @traced("node.find_near_duplicate")
+    def find_near_duplicate(self, state: BlogBuilderState) -> BlogBuilderState:
+        """
+        Look for a prior analysis of a near-identical article before calling the LLM.
+
+        Args:
+            state (BlogBuilderState): Current state containing 'article_ref'.
+
+        Returns:
+            BlogBuilderState: On a match, the prior analysis (title, topics, sentiment,
+            summary, keywords) plus 'duplicate_of'; otherwise the article's 'minhash'
+            signature so it can be indexed once analyzed.
+        """
+        user_input = self._article(state)
+        if not user_input or not near_duplicate_index.enabled:
+            return {}
+
+        signature = near_duplicate_index.hasher.signature(user_input)
+        match = near_duplicate_index.query(signature)
+        if match:
+            analysis = near_duplicate_index.fetch_analysis(match[0])
+            if analysis:
+                return {**analysis, "duplicate_of": match[0]}
+
+        return {"minhash": signature.tobytes()}
+
+    def route_after_duplicate_check(self, state: BlogBuilderState) -> str:
+        """
+        Skip the LLM steps when a prior analysis was reused.
+
+        Returns:
+            str: END for near-duplicates, otherwise "collect_blog_details".
+        """
+        return END if state.get("duplicate_of") else "collect_blog_details"
+
+    @traced("node.collect_blog_details")
+    def collect_blog_details(
+        self, state: BlogBuilderState, config: RunnableConfig
+    ) -> BlogBuilderState:
         """
         Extract title, topics, and sentiment from the user-provided input using an LLM.
 
         Args:
-            state (BlogBuilderState): Current state containing 'user_input'.
+            state (BlogBuilderState): Current state containing 'article_ref'.
+            config (RunnableConfig): Run configuration (carries the scheduling priority).
 
         Returns:
-            BlogBuilderState: Updated state with 'title', 'topics', and 'sentiment' if valid.
+            BlogBuilderState: Update with 'title', 'topics', and 'sentiment' if valid.
             If invalid or LLM fails, interrupts with a retry request.
         """
-        user_input = state.get("user_input")
+        user_input = self._article(state)
 
         if not user_input:
             return interrupt(
@@ -67,7 +137,12 @@ class BlogDetails:
         """
 
         try:
-            response = LLMHandler().blog_llm().invoke(prompt)
+            response = LLMHandler().invoke(
+                prompt,
+                task=TASK_EXTRACTION,
+                structured=True,
+                priority=self._priority(config),
+            )
             title = response.title
             topics = response.topics
             sentiment = response.sentiment
@@ -76,27 +151,28 @@ class BlogDetails:
             return interrupt(f"LLM error while extracting blog details: {str(e)}")
 
         if topics != "INVALID" and sentiment != "INVALID":
-            state["title"] = title
-            state["topics"] = topics
-            state["sentiment"] = sentiment
-            return state
+            return {"title": title, "topics": topics, "sentiment": sentiment}
         else:
             return interrupt(
                 "Sorry, try again. Kindly drop the article or blog post you want to generate details for."
             )
 
-    def generate_summary(self, state: BlogBuilderState) -> BlogBuilderState:
+    @traced("node.generate_summary")
+    def generate_summary(
+        self, state: BlogBuilderState, config: RunnableConfig
+    ) -> BlogBuilderState:
         """
         Generate a 1–2 sentence summary of the user-provided input using an LLM.
 
         Args:
-            state (BlogBuilderState): Current state containing 'user_input'.
+            state (BlogBuilderState): Current state containing 'article_ref'.
+            config (RunnableConfig): Run configuration (carries the scheduling priority).
 
         Returns:
-            BlogBuilderState: Updated state with 'summary'.
+            BlogBuilderState: Update with 'summary'.
             If LLM fails, stores the error message instead.
         """
-        user_input = state.get("user_input")
+        user_input = self._article(state)
 
         prompt = f"""
             You are an AI assistant. Summarize the following article or blog in **1-2 concise sentences**, 
@@ -109,25 +185,28 @@ class BlogDetails:
             """
 
         try:
-            response = LLMHandler().get_llm().invoke(prompt)
-            state["summary"] = response.content
+            response = LLMHandler().invoke(
+                prompt, task=TASK_SUMMARY, priority=self._priority(config)
+            )
+            summary = response.content
         except Exception as e:
-            state["summary"] = f"LLM error: {str(e)}"
+            summary = f"LLM error: {str(e)}"
 
-        return state
+        return {"summary": summary}
 
+    @traced("node.get_keywords")
     def get_keywords(self, state: BlogBuilderState, top_n: int = 3) -> BlogBuilderState:
         """
         Extract the top-N most frequent nouns (keywords) from user input.
 
         Args:
-            state (BlogBuilderState): Current state containing 'user_input'.
+            state (BlogBuilderState): Current state containing 'article_ref'.
             top_n (int): Number of top keywords to return. Defaults to 3.
 
         Returns:
-            BlogBuilderState: Updated state with 'keywords' as a list of top nouns.
+            BlogBuilderState: Update with 'keywords' as a list of top nouns.
         """
-        user_input = state.get("user_input", "")
+        user_input = self._article(state)
 
         # Tokenize and POS tagging
         words = nltk.word_tokenize(user_input)
@@ -146,5 +225,4 @@ class BlogDetails:
         noun_freq = Counter(nouns)
         keywords = [word for word, _ in noun_freq.most_common(top_n)]
 
-        state["keywords"] = keywords
-        return state
+        return {"keywords": keywords}
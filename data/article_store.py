@@ -0,0 +1,175 @@
+import hashlib
+import os
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Optional
+
+from data.postgres_db import PostgreSQL, run_sync
+
+
+def content_hash(text: str) -> str:
+    """
+    Content address of an article.
+
+    Args:
+        text (str): Article text.
+
+    Returns:
+        str: Hex SHA-256 digest of the UTF-8 encoded text.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class InMemoryArticleStore:
+    """
+    Content-addressed article store kept in process memory.
+
+    Identical articles are stored once, however many sessions submit them.
+    Like the in-memory checkpointer, contents are lost on restart. Each `put`
+    holds a reference; an article is dropped once every holder has called
+    `release` (sessions that never release keep theirs for the process lifetime).
+    """
+
+    def __init__(self):
+        self._articles: Dict[str, str] = {}
+        self._holders: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def put(self, text: str) -> str:
+        """
+        Store an article (no-op if already stored).
+
+        Args:
+            text (str): Article text.
+
+        Returns:
+            str: Reference (content hash) to keep in the graph state.
+        """
+        ref = content_hash(text)
+        with self._lock:
+            self._articles.setdefault(ref, text)
+            self._holders[ref] += 1
+        return ref
+
+    def release(self, ref: Optional[str]) -> None:
+        """
+        Drop one holder's reference, deleting the article when none remain.
+
+        Args:
+            ref (Optional[str]): Reference returned by `put`.
+        """
+        with self._lock:
+            if not ref or ref not in self._holders:
+                return
+            self._holders[ref] -= 1
+            if self._holders[ref] <= 0:
+                del self._holders[ref]
+                self._articles.pop(ref, None)
+
+    def get(self, ref: Optional[str]) -> str:
+        """
+        Load an article by reference.
+
+        Args:
+            ref (Optional[str]): Reference returned by `put`.
+
+        Returns:
+            str: The article text, or "" if the reference is empty or unknown.
+        """
+        return self._articles.get(ref, "") if ref else ""
+
+
+class PostgresArticleStore:
+    """
+    Durable content-addressed article store in the 'article_blobs' table.
+
+    Uses the same asyncpg-based PostgreSQL client as the rest of the service;
+    graph nodes are synchronous, so calls go through `run_sync`. The table is
+    created on first use, and recently loaded articles are cached in memory.
+    """
+
+    def __init__(self, cache_size: int = 256):
+        """
+        Args:
+            cache_size (int): Number of articles kept in the in-process LRU cache.
+        """
+        # Misses raise inside the cached loader, so lru_cache never stores them
+        self._cached_load = lru_cache(maxsize=cache_size)(self._load)
+        self._table_ready = False
+        self._lock = threading.Lock()
+
+    def _ensure_table(self) -> None:
+        with self._lock:
+            if not self._table_ready:
+                run_sync(PostgreSQL().ensure_article_table())
+                self._table_ready = True
+
+    def put(self, text: str) -> str:
+        """
+        Store an article (no-op if already stored).
+
+        Args:
+            text (str): Article text.
+
+        Returns:
+            str: Reference (content hash) to keep in the graph state.
+        """
+        self._ensure_table()
+        ref = content_hash(text)
+        # Fresh client per call: PostgreSQL keeps a single connection attribute
+        run_sync(PostgreSQL().put_article(ref, text))
+        return ref
+
+    def release(self, ref: Optional[str]) -> None:
+        """No-op: stored articles are durable and shared across processes."""
+
+    def get(self, ref: Optional[str]) -> str:
+        """
+        Load an article by reference.
+
+        Only found articles are cached; an unknown reference is looked up again
+        next time, since it may belong to a write that is not visible yet.
+
+        Args:
+            ref (Optional[str]): Reference returned by `put`.
+
+        Returns:
+            str: The article text, or "" if the reference is empty or unknown.
+        """
+        if not ref:
+            return ""
+        try:
+            return self._cached_load(ref)
+        except KeyError:
+            return ""
+
+    def _load(self, ref: str) -> str:
+        """Load an article by reference, raising KeyError if it is not stored."""
+        self._ensure_table()
+        text = run_sync(PostgreSQL().get_article(ref))
+        if text is None:
+            raise KeyError(ref)
+        return text
+
+
+def get_article_store():
+    """
+    Build the article store selected by the `article_store` environment variable.
+
+    Returns:
+        InMemoryArticleStore | PostgresArticleStore: "memory" (default) or "postgres".
+
+    Raises:
+        ValueError: If `article_store` names an unknown backend.
+    """
+    backend = os.getenv("article_store", "memory").lower()
+    if backend == "memory":
+        return InMemoryArticleStore()
+    if backend == "postgres":
+        return PostgresArticleStore()
+    raise ValueError(f"❌ Unknown article_store '{backend}'. Use 'memory' or 'postgres'.")
+
+
+# Shared store: the API / job worker put articles in, graph nodes read them back
+article_store = get_article_store()
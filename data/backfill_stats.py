@@ -0,0 +1,21 @@
+import asyncio
+
+from data.postgres_db import PostgreSQL
+
+
+async def main() -> None:
+    """
+    Create the stats aggregate tables (if needed) and rebuild them from
+    every row already stored in 'blog_details'.
+
+    Daily volume starts when the `created_at` column was added; older rows
+    have no analysis date and only count towards topics, keywords and sentiment.
+
+    Usage:
+        python -m data.backfill_stats
+    """
+    await PostgreSQL().backfill_stats()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
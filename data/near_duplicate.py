@@ -0,0 +1,357 @@
+import asyncio
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from data.postgres_db import PostgreSQL, run_sync
+from helper_functions.tracing import traced
+
+# Mersenne prime 2^61 - 1 for the universal hash family
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+class MinHasher:
+    """
+    Computes MinHash signatures of articles over word shingles.
+
+    Text is lower-cased and split into word tokens; each run of
+    `shingle_size` consecutive words is one shingle. Two signatures agree in a
+    fraction of positions that estimates the Jaccard similarity of the
+    articles' shingle sets, so small edits (bylines, trackers, footers) only
+    lower the similarity slightly.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        """
+        Args:
+            num_perm (int): Number of hash permutations (signature length).
+            shingle_size (int): Words per shingle.
+            seed (int): Seed for the permutation parameters (must match across processes).
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        # a, b < 2^31 keep a * x + b (x < 2^32) within uint64
+        self.a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self.b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+
+    def shingles(self, text: str) -> List[bytes]:
+        """
+        Word shingles of `text` (the whole token list if it is shorter than one shingle).
+        """
+        words = re.findall(r"\w+", text.lower())
+        if len(words) <= self.shingle_size:
+            return [" ".join(words).encode("utf-8")] if words else []
+        return [
+            " ".join(words[i : i + self.shingle_size]).encode("utf-8")
+            for i in range(len(words) - self.shingle_size + 1)
+        ]
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        MinHash signature of an article.
+
+        Args:
+            text (str): Article text.
+
+        Returns:
+            np.ndarray: `num_perm` uint32 values (all 0xFFFFFFFF for empty text).
+        """
+        shingles = set(self.shingles(text))
+        if not shingles:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+
+        hashes = np.fromiter(
+            (zlib.crc32(s) for s in shingles), dtype=np.uint64, count=len(shingles)
+        )
+        permuted = (np.outer(self.a, hashes) + self.b[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=1).astype(np.uint32)
+
+
+def estimate_jaccard(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return float(np.mean(first == second))
+
+
+def optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Pick the LSH band layout whose S-curve threshold is closest to `threshold`.
+
+    With `bands` bands of `rows` rows, two documents become candidates with
+    probability 1 - (1 - s^rows)^bands, which rises steeply around
+    (1 / bands)^(1 / rows).
+
+    Returns:
+        Tuple[int, int]: (bands, rows) with bands * rows == num_perm.
+    """
+    layouts = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    # Prefer layouts whose threshold sits slightly below the target (fewer misses)
+    return min(
+        layouts,
+        key=lambda layout: abs((1 / layout[0]) ** (1 / layout[1]) - (threshold - 0.05)),
+    )
+
+
+class NearDuplicateIndex:
+    """
+    MinHash + LSH index of analyzed articles, used to reuse prior analyses.
+
+    Signatures are persisted in the 'article_minhash' table alongside
+    'blog_details' and mirrored in memory, where a lookup costs one dict probe
+    per LSH band plus a vectorized comparison against the few candidates.
+    The in-memory copy picks up rows written by other processes on `refresh`.
+
+    Lookups never touch the database: a background task started with
+    `start_refresh_loop` pulls new rows every `near_duplicate_refresh_seconds`.
+
+    Every process holds its own mirror, at about 2.4 KB per document with the
+    default 128 permutations (signature plus one bucket entry per band). It is
+    capped at `near_duplicate_max_documents`; beyond that the oldest documents
+    are evicted, so only recent articles are matched. Raise the cap if memory
+    allows (1,000,000 documents is about 2.4 GB per process).
+
+    Configuration (environment variables):
+        near_duplicate_enabled (default "true")
+        near_duplicate_threshold (default 0.8): minimum estimated Jaccard similarity.
+        near_duplicate_num_perm (default 128): MinHash signature length.
+        near_duplicate_refresh_seconds (default 30): how often new rows are pulled.
+        near_duplicate_max_documents (default 50000): documents kept in memory (~120 MB).
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        num_perm: Optional[int] = None,
+        max_documents: Optional[int] = None,
+        persist: bool = True,
+    ):
+        """
+        Args:
+            threshold (Optional[float]): Minimum estimated Jaccard similarity for a match.
+            num_perm (Optional[int]): MinHash signature length.
+            max_documents (Optional[int]): Documents kept in memory before evicting the oldest.
+            persist (bool): If False, the index lives only in memory (tests, benchmarks).
+        """
+        self.enabled = os.getenv("near_duplicate_enabled", "true").lower() == "true"
+        self.threshold = threshold or float(os.getenv("near_duplicate_threshold", 0.8))
+        num_perm = num_perm or int(os.getenv("near_duplicate_num_perm", 128))
+        self.refresh_seconds = float(os.getenv("near_duplicate_refresh_seconds", 30))
+        self.max_documents = max_documents or int(
+            os.getenv("near_duplicate_max_documents", 50000)
+        )
+        self.persist = persist
+
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.bands, self.rows = optimal_bands(self.threshold, num_perm)
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._keys: List[Optional[str]] = []
+        # Insertion order doubles as eviction order (oldest first)
+        self._positions: "OrderedDict[str, int]" = OrderedDict()
+        self._free: List[int] = []
+        self._signatures = np.empty((1024, num_perm), dtype=np.uint32)
+        # Band key -> position, or a list of positions once a bucket holds several
+        # (most buckets hold one document; a bare int is much smaller than a list)
+        self._buckets: List[Dict[int, Union[int, List[int]]]] = [{} for _ in range(self.bands)]
+        self._cursor: Optional[int] = None
+        self._refreshed_at: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def _band_keys(self, signature: np.ndarray) -> List[int]:
+        data = signature.tobytes()
+        width = self.rows * 4
+        return [hash(data[band * width : (band + 1) * width]) for band in range(self.bands)]
+
+    def _unlink(self, position: int) -> None:
+        """Remove a position from its LSH buckets (caller holds the lock)."""
+        for band, band_key in enumerate(self._band_keys(self._signatures[position])):
+            bucket = self._buckets[band]
+            entry = bucket.get(band_key)
+            if entry == position:
+                del bucket[band_key]
+            elif isinstance(entry, list) and position in entry:
+                entry.remove(position)
+                if len(entry) == 1:
+                    bucket[band_key] = entry[0]
+
+    def _evict_oldest(self) -> None:
+        """Drop the oldest document (caller holds the lock)."""
+        key, position = self._positions.popitem(last=False)
+        self._unlink(position)
+        self._keys[position] = None
+        self._free.append(position)
+
+    def add(self, key: str, signature: Union[np.ndarray, bytes]) -> None:
+        """
+        Add (or replace) a document's signature in the in-memory index.
+
+        Args:
+            key (str): Session id of the analysis.
+            signature (np.ndarray | bytes): MinHash signature (or its raw bytes).
+        """
+        if isinstance(signature, (bytes, bytearray, memoryview)):
+            signature = np.frombuffer(signature, dtype=np.uint32)
+
+        with self._lock:
+            position = self._positions.get(key)
+            if position is not None:
+                if np.array_equal(self._signatures[position], signature):
+                    return
+                self._unlink(position)
+            else:
+                if len(self._positions) >= self.max_documents:
+                    self._evict_oldest()
+                if self._free:
+                    position = self._free.pop()
+                    self._keys[position] = key
+                else:
+                    position = len(self._keys)
+                    if position == len(self._signatures):
+                        self._signatures = np.concatenate(
+                            [self._signatures, np.empty_like(self._signatures)]
+                        )
+                    self._keys.append(key)
+                self._positions[key] = position
+
+            self._signatures[position] = signature
+            for band, band_key in enumerate(self._band_keys(signature)):
+                bucket = self._buckets[band]
+                entry = bucket.get(band_key)
+                if entry is None:
+                    bucket[band_key] = position
+                elif isinstance(entry, list):
+                    entry.append(position)
+                else:
+                    bucket[band_key] = [entry, position]
+
+    @traced("near_duplicate.query")
+    def query(self, signature: np.ndarray) -> Optional[Tuple[str, float]]:
+        """
+        Find the most similar indexed document above the threshold.
+
+        Args:
+            signature (np.ndarray): MinHash signature of the new article.
+
+        Returns:
+            Optional[Tuple[str, float]]: (session_id, estimated Jaccard) of the best
+            match, or None if no document reaches the threshold.
+        """
+        with self._lock:
+            candidates = set()
+            for band, band_key in enumerate(self._band_keys(signature)):
+                entry = self._buckets[band].get(band_key)
+                if entry is None:
+                    continue
+                if isinstance(entry, list):
+                    candidates.update(entry)
+                else:
+                    candidates.add(entry)
+            if not candidates:
+                return None
+
+            positions = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            similarities = (self._signatures[positions] == signature).mean(axis=1)
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+            return self._keys[positions[best]], float(similarities[best])
+
+    @property
+    def refreshed(self) -> bool:
+        """Whether the index has loaded the persisted signatures at least once."""
+        return self._refreshed_at is not None
+
+    def start_refresh_loop(self) -> Optional[asyncio.Task]:
+        """
+        Start the background task that refreshes the index every
+        `refresh_seconds` (no-op if it is already running or the index is not persisted).
+
+        Returns:
+            Optional[asyncio.Task]: The refresh task, to cancel on shutdown.
+        """
+        if not self.persist:
+            return None
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+        return self._refresh_task
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            await asyncio.to_thread(self.refresh)
+
+    @traced("near_duplicate.refresh")
+    def refresh(self) -> None:
+        """
+        Load signatures persisted since the last refresh.
+
+        The first refresh loads the most recent `max_documents`. Later ones resume
+        from a transaction-id cursor (see `PostgreSQL.get_minhashes`), so rows
+        committed late by other processes are still picked up. Concurrent calls
+        skip rather than wait.
+        """
+        if not self.persist or not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            try:
+                rows, cursor = run_sync(
+                    PostgreSQL().get_minhashes(
+                        self._cursor, self.max_documents if self._cursor is None else None
+                    )
+                )
+            except Exception as e:
+                print("❌ Error loading near-duplicate index:", e)
+                return
+
+            expected_size = self.hasher.num_perm * 4
+            skipped = 0
+            for row in rows:
+                signature = bytes(row["signature"])
+                # Rows written under a different near_duplicate_num_perm cannot be compared
+                if len(signature) != expected_size:
+                    skipped += 1
+                    continue
+                self.add(row["session_id"], signature)
+            if skipped:
+                print(
+                    f"❌ Skipped {skipped} near-duplicate signatures of the wrong length "
+                    f"(expected {self.hasher.num_perm} permutations)."
+                )
+            self._cursor = cursor
+            self._refreshed_at = time.monotonic()
+        finally:
+            self._refresh_lock.release()
+
+    def fetch_analysis(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a prior analysis from 'blog_details'.
+
+        Args:
+            session_id (str): Session id of the matching analysis.
+
+        Returns:
+            Optional[Dict[str, Any]]: title, topics, sentiment, summary and keywords,
+            or None if it cannot be loaded.
+        """
+        if not self.persist:
+            return None
+        try:
+            return run_sync(PostgreSQL().get_blog_details(session_id))
+        except Exception as e:
+            print("❌ Error loading prior analysis:", e)
+            return None
+
+
+# Shared index: graph nodes query it, persisted analyses are added to it
+near_duplicate_index = NearDuplicateIndex()
@@ -1,5 +1,37 @@
+import asyncio
 import asyncpg
-from typing import Optional, List, Dict, Any
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Awaitable, Tuple, TypeVar
+from helper_functions.tracing import traced
+
+T = TypeVar("T")
+
+
+def run_sync(awaitable: Awaitable[T]) -> T:
+    """
+    Run a PostgreSQL coroutine from synchronous code, e.g. a LangGraph node.
+
+    Graph nodes run in worker threads without an event loop, where the coroutine
+    gets a short-lived loop of its own. If the caller's thread is already running
+    a loop (where a second one cannot start), the coroutine runs on a helper
+    thread. Trace spans are kept either way.
+
+    Args:
+        awaitable (Awaitable[T]): Coroutine to run, e.g. `PostgreSQL().get_article(ref)`.
+
+    Returns:
+        T: The coroutine's result.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(awaitable)
+
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(context.run, asyncio.run, awaitable).result()
 
 
 class PostgreSQL:
@@ -10,6 +42,10 @@ class PostgreSQL:
     - Connection lifecycle (connect/close)
     - Inserting processed blog details into the database
     - Searching blog analyses by topic or keyword
+    - Maintaining topic / keyword / sentiment / daily volume aggregates for `/stats`
+    - Persisting near-duplicate (MinHash) signatures of analyzed articles
+    - Storing article texts by content hash ('article_blobs' table)
+    - Managing the asynchronous analysis job queue ('analysis_jobs' table)
     """
 
     def __init__(self):
@@ -57,6 +93,7 @@ class PostgreSQL:
         except Exception as e:
             print("❌ Error closing the connection:", e)
 
+    @traced("db.insert_blog_details")
     async def insert_blog_details(
         self,
         session_id: str,
@@ -65,10 +102,15 @@ class PostgreSQL:
         sentiment: str,
         summary: str,
         keywords: List[str],
+        minhash: Optional[bytes] = None,
     ) -> Optional[str]:
         """
         Insert a new record into the 'blog_details' table.
 
+        The stats aggregates (and the article's MinHash signature, if given) are
+        written in the same transaction, so they never drift from the rows they describe.
+        A failing stats update is logged and skipped rather than losing the analysis.
+
         Args:
             session_id (str): Unique session identifier (UUID or string).
             title (Optional[str]): Title of the blog (nullable).
@@ -76,6 +118,7 @@ class PostgreSQL:
             sentiment (str): Sentiment label ("positive", "neutral", "negative").
             summary (str): Generated summary of the blog.
             keywords (List[str]): List of extracted keywords.
+            minhash (Optional[bytes]): Near-duplicate signature of the article.
 
         Returns:
             Optional[str]: The session_id of the inserted row if successful, None otherwise.
@@ -83,27 +126,14 @@ class PostgreSQL:
         try:
             await self.connect()
 
-            insert_query = """
-                INSERT INTO blog_details (
-                    session_id, title, topics, sentiment, summary, keywords
+            async with self.connection.transaction():
+                result = await self._insert_analysis(
+                    session_id, title, topics, sentiment, summary, keywords, minhash
                 )
-                VALUES ($1, $2, $3, $4, $5, $6)
-                RETURNING session_id;
-            """
-
-            result = await self.connection.fetchrow(
-                insert_query,
-                session_id,
-                title,
-                topics,
-                sentiment,
-                summary,
-                keywords,
-            )
 
             if result:
-                print(f"✅ Inserted blog details for session {result['session_id']}")
-                return result["session_id"]
+                print(f"✅ Inserted blog details for session {result}")
+                return result
 
         except Exception as e:
             print("❌ Error inserting blog details:", e)
@@ -112,6 +142,463 @@ class PostgreSQL:
         finally:
             await self.close()
 
+    async def _insert_analysis(
+        self,
+        session_id: str,
+        title: Optional[str],
+        topics: List[str],
+        sentiment: str,
+        summary: str,
+        keywords: List[str],
+        minhash: Optional[bytes] = None,
+    ) -> Optional[str]:
+        """
+        Insert an analysis, its stats and its signature (must run inside a transaction).
+
+        The stats update runs in a savepoint: if it fails, the analysis is still
+        stored and the aggregates can be rebuilt with `backfill_stats`.
+
+        Returns:
+            Optional[str]: The inserted session_id.
+        """
+        result = await self.connection.fetchrow(
+            """
+            INSERT INTO blog_details (
+                session_id, title, topics, sentiment, summary, keywords
+            )
+            VALUES ($1, $2, $3, $4, $5, $6)
+            RETURNING session_id;
+            """,
+            session_id,
+            title,
+            topics,
+            sentiment,
+            summary,
+            keywords,
+        )
+        try:
+            # Savepoint: a stats failure must not roll back the analysis row itself
+            async with self.connection.transaction():
+                await self._update_stats(topics, sentiment, keywords)
+        except Exception as e:
+            print(
+                "❌ Error updating stats aggregates (run `python -m data.backfill_stats`):", e
+            )
+        if minhash is not None:
+            await self.connection.execute(
+                """
+                INSERT INTO article_minhash (session_id, signature)
+                VALUES ($1, $2)
+                ON CONFLICT (session_id)
+                    DO UPDATE SET signature = EXCLUDED.signature, txid = EXCLUDED.txid;
+                """,
+                session_id,
+                minhash,
+            )
+        return result["session_id"] if result else None
+
+    async def _update_stats(
+        self, topics: List[str], sentiment: str, keywords: List[str]
+    ) -> None:
+        """
+        Add one analysis to the aggregate tables (must run inside the insert's transaction).
+
+        Topics and keywords are lower-cased and counted once per analysis.
+        """
+        await self.connection.execute(
+            """
+            INSERT INTO topic_counts (topic, count)
+            SELECT DISTINCT LOWER(t), 1 FROM unnest($1::text[]) t
+            ON CONFLICT (topic) DO UPDATE SET count = topic_counts.count + 1;
+            """,
+            topics,
+        )
+        await self.connection.execute(
+            """
+            INSERT INTO keyword_counts (keyword, count)
+            SELECT DISTINCT LOWER(k), 1 FROM unnest($1::text[]) k
+            ON CONFLICT (keyword) DO UPDATE SET count = keyword_counts.count + 1;
+            """,
+            keywords,
+        )
+        await self.connection.execute(
+            """
+            INSERT INTO topic_sentiment_counts (topic, sentiment, count)
+            SELECT DISTINCT LOWER(t), $2, 1 FROM unnest($1::text[]) t
+            ON CONFLICT (topic, sentiment)
+                DO UPDATE SET count = topic_sentiment_counts.count + 1;
+            """,
+            topics,
+            sentiment,
+        )
+        await self.connection.execute(
+            """
+            INSERT INTO daily_counts (day, count)
+            VALUES (CURRENT_DATE, 1)
+            ON CONFLICT (day) DO UPDATE SET count = daily_counts.count + 1;
+            """
+        )
+
+    @traced("db.ensure_stats_tables")
+    async def ensure_stats_tables(self) -> None:
+        """
+        Create the stats aggregate tables if they do not exist, and add a
+        `created_at` column to 'blog_details' for daily volume.
+
+        Rows stored before the column existed keep a NULL `created_at`: there is no
+        record of when they were analyzed, so they count towards topics, keywords
+        and sentiment but not towards daily volume.
+
+        Raises:
+            Exception: If the DDL fails.
+        """
+        try:
+            await self.connect()
+
+            # ALTER TABLE takes an exclusive lock; only migrate once
+            has_created_at = await self.connection.fetchval(
+                """
+                SELECT EXISTS (
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_schema = current_schema()
+                        AND table_name = 'blog_details'
+                        AND column_name = 'created_at'
+                );
+                """
+            )
+            if not has_created_at:
+                await self.connection.execute(
+                    """
+                    ALTER TABLE blog_details ADD COLUMN IF NOT EXISTS created_at TIMESTAMPTZ;
+                    ALTER TABLE blog_details ALTER COLUMN created_at SET DEFAULT now();
+                    """
+                )
+
+            await self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS topic_counts (
+                    topic TEXT PRIMARY KEY,
+                    count BIGINT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS topic_counts_count_idx ON topic_counts (count DESC);
+
+                CREATE TABLE IF NOT EXISTS keyword_counts (
+                    keyword TEXT PRIMARY KEY,
+                    count BIGINT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS keyword_counts_count_idx ON keyword_counts (count DESC);
+
+                CREATE TABLE IF NOT EXISTS topic_sentiment_counts (
+                    topic TEXT NOT NULL,
+                    sentiment TEXT NOT NULL,
+                    count BIGINT NOT NULL,
+                    PRIMARY KEY (topic, sentiment)
+                );
+
+                CREATE TABLE IF NOT EXISTS daily_counts (
+                    day DATE PRIMARY KEY,
+                    count BIGINT NOT NULL
+                );
+                """
+            )
+        finally:
+            await self.close()
+
+    @traced("db.ensure_minhash_table")
+    async def ensure_minhash_table(self) -> None:
+        """
+        Create the 'article_minhash' table holding near-duplicate signatures
+        of analyzed articles, if it does not exist.
+
+        Each row records the id of the transaction that wrote it (`txid`), which
+        `get_minhashes` uses as a cursor that cannot skip late-committing rows.
+
+        Raises:
+            Exception: If the DDL fails.
+        """
+        try:
+            await self.connect()
+            await self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS article_minhash (
+                    session_id TEXT PRIMARY KEY,
+                    signature BYTEA NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                );
+                ALTER TABLE article_minhash
+                    ADD COLUMN IF NOT EXISTS txid BIGINT NOT NULL DEFAULT 0;
+                ALTER TABLE article_minhash
+                    ALTER COLUMN txid SET DEFAULT pg_current_xact_id()::text::bigint;
+                DROP INDEX IF EXISTS article_minhash_created_idx;
+                CREATE INDEX IF NOT EXISTS article_minhash_txid_idx ON article_minhash (txid);
+                """
+            )
+        finally:
+            await self.close()
+
+    @traced("db.get_minhashes")
+    async def get_minhashes(
+        self, since_txid: Optional[int] = None, limit: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Read near-duplicate signatures written since a cursor.
+
+        The returned cursor is the oldest transaction still running when the rows
+        were read. Every transaction before it has finished, so reading again from
+        the cursor picks up all rows committed later, however long their transaction
+        ran. Rows near the cursor may be returned twice.
+
+        Args:
+            since_txid (Optional[int]): Cursor from the previous call; None reads from the start.
+            limit (Optional[int]): If set, return only the `limit` most recent rows.
+
+        Returns:
+            Tuple[List[Dict[str, Any]], int]: Rows (session_id, signature), oldest first,
+            and the cursor for the next call.
+
+        Raises:
+            Exception: If the query fails.
+        """
+        try:
+            await self.connect()
+
+            # Both statements must see the same snapshot
+            async with self.connection.transaction(isolation="repeatable_read", readonly=True):
+                cursor = await self.connection.fetchval(
+                    "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint;"
+                )
+                rows = await self.connection.fetch(
+                    """
+                    SELECT session_id, signature
+                    FROM (
+                        SELECT session_id, signature, txid
+                        FROM article_minhash
+                        WHERE $1::bigint IS NULL OR txid >= $1::bigint
+                        ORDER BY txid DESC
+                        LIMIT $2
+                    ) recent
+                    ORDER BY txid;
+                    """,
+                    since_txid,
+                    limit,
+                )
+            return [dict(row) for row in rows], cursor
+
+        finally:
+            await self.close()
+
+    @traced("db.get_blog_details")
+    async def get_blog_details(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch one stored analysis.
+
+        Args:
+            session_id (str): Session identifier of the analysis.
+
+        Returns:
+            Optional[Dict[str, Any]]: title, topics, sentiment, summary and keywords,
+            or None if not found.
+
+        Raises:
+            Exception: If the query fails.
+        """
+        try:
+            await self.connect()
+            row = await self.connection.fetchrow(
+                """
+                SELECT title, topics, sentiment, summary, keywords
+                FROM blog_details
+                WHERE session_id = $1;
+                """,
+                session_id,
+            )
+            return dict(row) if row else None
+
+        finally:
+            await self.close()
+
+    @traced("db.ensure_article_table")
+    async def ensure_article_table(self) -> None:
+        """
+        Create the 'article_blobs' table holding content-addressed article texts,
+        if it does not exist.
+
+        Raises:
+            Exception: If the DDL fails.
+        """
+        try:
+            await self.connect()
+            await self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS article_blobs (
+                    content_hash TEXT PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                );
+                """
+            )
+        finally:
+            await self.close()
+
+    @traced("db.put_article")
+    async def put_article(self, content_hash: str, content: str) -> None:
+        """
+        Store an article text under its content hash (no-op if already stored).
+
+        Args:
+            content_hash (str): Hex SHA-256 digest of the text.
+            content (str): Article text.
+
+        Raises:
+            Exception: If the insert fails.
+        """
+        try:
+            await self.connect()
+            await self.connection.execute(
+                """
+                INSERT INTO article_blobs (content_hash, content)
+                VALUES ($1, $2)
+                ON CONFLICT (content_hash) DO NOTHING;
+                """,
+                content_hash,
+                content,
+            )
+        finally:
+            await self.close()
+
+    @traced("db.get_article")
+    async def get_article(self, content_hash: str) -> Optional[str]:
+        """
+        Load an article text by content hash.
+
+        Args:
+            content_hash (str): Hex SHA-256 digest of the text.
+
+        Returns:
+            Optional[str]: The article text, or None if it is not stored.
+
+        Raises:
+            Exception: If the query fails.
+        """
+        try:
+            await self.connect()
+            return await self.connection.fetchval(
+                "SELECT content FROM article_blobs WHERE content_hash = $1;", content_hash
+            )
+        finally:
+            await self.close()
+
+    @traced("db.backfill_stats")
+    async def backfill_stats(self) -> None:
+        """
+        Rebuild every aggregate table from the rows already in 'blog_details'.
+
+        Runs in one transaction and blocks concurrent inserts while it runs, so
+        the rebuilt aggregates are exact. Daily volume only covers rows with a
+        `created_at`, i.e. analyses stored since `ensure_stats_tables` added it.
+
+        Raises:
+            Exception: If the rebuild fails (the previous aggregates are kept).
+        """
+        await self.ensure_stats_tables()
+        try:
+            await self.connect()
+            async with self.connection.transaction():
+                await self.connection.execute(
+                    """
+                    LOCK TABLE blog_details IN SHARE MODE;
+                    TRUNCATE topic_counts, keyword_counts, topic_sentiment_counts, daily_counts;
+
+                    INSERT INTO topic_counts (topic, count)
+                    SELECT t, COUNT(*)
+                    FROM blog_details b,
+                        LATERAL (SELECT DISTINCT LOWER(x) AS t FROM unnest(b.topics) x) ts
+                    GROUP BY t;
+
+                    INSERT INTO keyword_counts (keyword, count)
+                    SELECT k, COUNT(*)
+                    FROM blog_details b,
+                        LATERAL (SELECT DISTINCT LOWER(x) AS k FROM unnest(b.keywords) x) ks
+                    GROUP BY k;
+
+                    INSERT INTO topic_sentiment_counts (topic, sentiment, count)
+                    SELECT t, b.sentiment, COUNT(*)
+                    FROM blog_details b,
+                        LATERAL (SELECT DISTINCT LOWER(x) AS t FROM unnest(b.topics) x) ts
+                    GROUP BY t, b.sentiment;
+
+                    INSERT INTO daily_counts (day, count)
+                    SELECT created_at::date, COUNT(*)
+                    FROM blog_details
+                    WHERE created_at IS NOT NULL
+                    GROUP BY created_at::date;
+                    """
+                )
+            print("✅ Stats aggregates rebuilt from blog_details.")
+        finally:
+            await self.close()
+
+    @traced("db.get_stats")
+    async def get_stats(self, top_n: int = 10, days: int = 30) -> Dict[str, Any]:
+        """
+        Read trend statistics from the aggregate tables.
+
+        Cost depends only on `top_n` and `days`, not on the number of analyses.
+
+        Args:
+            top_n (int): Number of top topics / keywords to return.
+            days (int): Number of most recent days of volume to return.
+
+        Returns:
+            Dict[str, Any]:
+                - top_topics (List[Dict]): {topic, count}, most frequent first
+                - top_keywords (List[Dict]): {keyword, count}, most frequent first
+                - sentiment_by_topic (Dict[str, Dict[str, int]]): sentiment counts per top topic
+                - daily_volume (List[Dict]): {day, count}, oldest first
+        """
+        try:
+            await self.connect()
+
+            topics = await self.connection.fetch(
+                "SELECT topic, count FROM topic_counts ORDER BY count DESC LIMIT $1;",
+                top_n,
+            )
+            keywords = await self.connection.fetch(
+                "SELECT keyword, count FROM keyword_counts ORDER BY count DESC LIMIT $1;",
+                top_n,
+            )
+            sentiments = await self.connection.fetch(
+                """
+                SELECT topic, sentiment, count
+                FROM topic_sentiment_counts
+                WHERE topic = ANY($1::text[]);
+                """,
+                [row["topic"] for row in topics],
+            )
+            daily = await self.connection.fetch(
+                """
+                SELECT day, count FROM daily_counts
+                WHERE day > CURRENT_DATE - $1::int
+                ORDER BY day;
+                """,
+                days,
+            )
+
+            sentiment_by_topic: Dict[str, Dict[str, int]] = {}
+            for row in sentiments:
+                sentiment_by_topic.setdefault(row["topic"], {})[row["sentiment"]] = row["count"]
+
+            return {
+                "top_topics": [dict(row) for row in topics],
+                "top_keywords": [dict(row) for row in keywords],
+                "sentiment_by_topic": sentiment_by_topic,
+                "daily_volume": [dict(row) for row in daily],
+            }
+
+        finally:
+            await self.close()
+
+    @traced("db.search_by_topic_or_keyword")
     async def search_by_topic_or_keyword(self, topic: str) -> List[Dict[str, Any]]:
         """
         Search blog analyses by topic or keyword (case-insensitive).
@@ -148,3 +635,279 @@ class PostgreSQL:
 
         finally:
             await self.close()
+
+    @traced("db.ensure_jobs_table")
+    async def ensure_jobs_table(self) -> None:
+        """
+        Create the 'analysis_jobs' table and its queue index if they do not exist.
+
+        Raises:
+            Exception: If the DDL fails.
+        """
+        try:
+            await self.connect()
+            await self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS analysis_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    user_input TEXT NOT NULL,
+                    callback_url TEXT,
+                    result JSONB,
+                    error TEXT,
+                    attempts INT NOT NULL DEFAULT 0,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    started_at TIMESTAMPTZ,
+                    finished_at TIMESTAMPTZ
+                );
+                CREATE INDEX IF NOT EXISTS analysis_jobs_status_created_idx
+                    ON analysis_jobs (status, created_at);
+                """
+            )
+        finally:
+            await self.close()
+
+    @traced("db.create_job")
+    async def create_job(
+        self, job_id: str, user_input: str, callback_url: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Enqueue a new analysis job.
+
+        Args:
+            job_id (str): Unique job identifier (UUID string).
+            user_input (str): Article or blog text to analyze.
+            callback_url (Optional[str]): URL notified (HTTP POST) when the job finishes.
+
+        Returns:
+            Optional[str]: The job_id if enqueued, None otherwise.
+        """
+        try:
+            await self.connect()
+
+            query = """
+                INSERT INTO analysis_jobs (job_id, user_input, callback_url)
+                VALUES ($1, $2, $3)
+                RETURNING job_id;
+            """
+
+            result = await self.connection.fetchrow(query, job_id, user_input, callback_url)
+            return result["job_id"] if result else None
+
+        except Exception as e:
+            print("❌ Error creating job:", e)
+            return None
+
+        finally:
+            await self.close()
+
+    @traced("db.claim_next_job")
+    async def claim_next_job(self, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """
+        Atomically claim the oldest queued job (or one whose worker's lease expired).
+
+        Uses `FOR UPDATE SKIP LOCKED` so any number of workers, in any process,
+        can poll the queue without claiming the same job twice.
+
+        Args:
+            lease_seconds (float): How long a 'running' job may go without finishing
+                or renewing its lease (`renew_job_lease`) before it is considered
+                abandoned and handed to another worker.
+
+        Returns:
+            Optional[Dict[str, Any]]: The claimed job (job_id, user_input, callback_url,
+            attempts), or None if the queue is empty. `attempts` doubles as the claim
+            token: `complete_job` / `finish_job` only succeed while it is unchanged.
+        """
+        try:
+            await self.connect()
+
+            query = """
+                UPDATE analysis_jobs
+                SET status = 'running', started_at = now(), attempts = attempts + 1
+                WHERE job_id = (
+                    SELECT job_id
+                    FROM analysis_jobs
+                    WHERE status = 'queued'
+                        OR (status = 'running' AND started_at < now() - make_interval(secs => $1))
+                    ORDER BY created_at
+                    FOR UPDATE SKIP LOCKED
+                    LIMIT 1
+                )
+                RETURNING job_id, user_input, callback_url, attempts;
+            """
+
+            row = await self.connection.fetchrow(query, float(lease_seconds))
+            return dict(row) if row else None
+
+        except Exception as e:
+            print("❌ Error claiming job:", e)
+            return None
+
+        finally:
+            await self.close()
+
+    @traced("db.renew_job_lease")
+    async def renew_job_lease(self, job_id: str, attempts: int) -> bool:
+        """
+        Extend a running job's lease (its worker's heartbeat).
+
+        Args:
+            job_id (str): Job identifier.
+            attempts (int): Claim token returned by `claim_next_job`.
+
+        Returns:
+            bool: True if renewed, False if the claim was lost to another worker.
+
+        Raises:
+            Exception: If the update fails.
+        """
+        try:
+            await self.connect()
+            row = await self.connection.fetchrow(
+                """
+                UPDATE analysis_jobs
+                SET started_at = now()
+                WHERE job_id = $1 AND status = 'running' AND attempts = $2
+                RETURNING job_id;
+                """,
+                job_id,
+                attempts,
+            )
+            return row is not None
+
+        finally:
+            await self.close()
+
+    @traced("db.complete_job")
+    async def complete_job(
+        self, job_id: str, attempts: int, analysis: Dict[str, Any], minhash: Optional[bytes] = None
+    ) -> bool:
+        """
+        Mark a claimed job done and persist its analysis, in one transaction.
+
+        Nothing is written unless this worker still holds the claim: if the lease
+        expired and another worker reclaimed the job, `attempts` no longer matches.
+
+        Args:
+            job_id (str): Job identifier (also the analysis session_id).
+            attempts (int): Claim token returned by `claim_next_job`.
+            analysis (Dict[str, Any]): title, topics, sentiment, summary and keywords.
+            minhash (Optional[bytes]): Near-duplicate signature of the article.
+
+        Returns:
+            bool: True if the job was completed by this claim, False if the claim was lost.
+
+        Raises:
+            Exception: If the database writes fail (nothing is committed).
+        """
+        try:
+            await self.connect()
+
+            async with self.connection.transaction():
+                owned = await self.connection.fetchrow(
+                    """
+                    UPDATE analysis_jobs
+                    SET status = 'done', result = $3::jsonb, error = NULL, finished_at = now()
+                    WHERE job_id = $1 AND status = 'running' AND attempts = $2
+                    RETURNING job_id;
+                    """,
+                    job_id,
+                    attempts,
+                    json.dumps(analysis),
+                )
+                if not owned:
+                    return False
+                await self._insert_analysis(job_id, minhash=minhash, **analysis)
+            return True
+
+        finally:
+            await self.close()
+
+    @traced("db.finish_job")
+    async def finish_job(
+        self,
+        job_id: str,
+        attempts: int,
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        """
+        Record the outcome of a claimed job.
+
+        Args:
+            job_id (str): Job identifier.
+            attempts (int): Claim token returned by `claim_next_job`.
+            status (str): Final status ("done" or "failed").
+            result (Optional[Dict[str, Any]]): Analysis result when done.
+            error (Optional[str]): Error message when failed.
+
+        Returns:
+            bool: True if recorded, False if the claim was lost (another worker
+            reclaimed the job) or the update failed.
+        """
+        try:
+            await self.connect()
+
+            query = """
+                UPDATE analysis_jobs
+                SET status = $3, result = $4::jsonb, error = $5, finished_at = now()
+                WHERE job_id = $1 AND status = 'running' AND attempts = $2
+                RETURNING job_id;
+            """
+
+            row = await self.connection.fetchrow(
+                query,
+                job_id,
+                attempts,
+                status,
+                json.dumps(result) if result is not None else None,
+                error,
+            )
+            return row is not None
+
+        except Exception as e:
+            print("❌ Error finishing job:", e)
+            return False
+
+        finally:
+            await self.close()
+
+    @traced("db.get_job")
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a job's status and result.
+
+        Args:
+            job_id (str): Job identifier.
+
+        Returns:
+            Optional[Dict[str, Any]]: The job row (job_id, status, result, error,
+            attempts, created_at, started_at, finished_at), or None if not found.
+        """
+        try:
+            await self.connect()
+
+            query = """
+                SELECT job_id, status, result, error, attempts,
+                    created_at, started_at, finished_at
+                FROM analysis_jobs
+                WHERE job_id = $1;
+            """
+
+            row = await self.connection.fetchrow(query, job_id)
+            if not row:
+                return None
+
+            job = dict(row)
+            if job["result"] is not None:
+                job["result"] = json.loads(job["result"])
+            return job
+
+        except Exception as e:
+            print("❌ Error fetching job:", e)
+            return None
+
+        finally:
+            await self.close()
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, HttpUrl, field_validator
 from typing import List, TypedDict, Literal, Optional
+import os
 
 
 class BlogBuilderState(TypedDict, total=False):
@@ -8,14 +9,21 @@ class BlogBuilderState(TypedDict, total=False):
 
     Used to track progress between steps in the pipeline.
     This is NOT exposed to the API directly.
+
+    The article itself is kept in the article store; `article_ref` is its
+    content hash, so checkpoints never copy the full text. `minhash` is the
+    article's near-duplicate signature and `duplicate_of` the session whose
+    analysis was reused, if any.
     """
 
-    user_input: str
+    article_ref: Optional[str]
     title: str
     topics: List[str]
     sentiment: Literal["positive", "neutral", "negative"]
     summary: str
     keywords: List[str]
+    minhash: bytes
+    duplicate_of: str
 
 
 class BlogDetails(BaseModel):
@@ -46,3 +54,81 @@ class ChatRequest(BaseModel):
         description="Raw article or blog text provided by the user.",
         example="Artificial Intelligence is reshaping the future of fashion retail.",
     )
+
+
+def is_allowed_callback_url(url: str) -> bool:
+    """
+    Check a job callback URL against the `job_callback_allowed_hosts` allowlist.
+
+    The server POSTs to callback URLs, so only http(s) URLs on hosts the operator
+    listed (comma-separated, e.g. "localhost,hooks.example.com") are accepted.
+    The allowlist is empty by default, which disables callbacks.
+
+    Args:
+        url (str): Callback URL.
+
+    Returns:
+        bool: True if the URL may be notified.
+    """
+    allowed = {
+        host.strip().lower()
+        for host in os.getenv("job_callback_allowed_hosts", "").split(",")
+        if host.strip()
+    }
+    try:
+        parsed = HttpUrl(url)
+    except Exception:
+        return False
+    return parsed.scheme in ("http", "https") and (parsed.host or "").lower() in allowed
+
+
+class JobRequest(BaseModel):
+    """
+    Incoming request schema for enqueuing an asynchronous analysis job.
+    """
+
+    user_input: str = Field(
+        ...,
+        description="Raw article or blog text to analyze.",
+        example="Artificial Intelligence is reshaping the future of fashion retail.",
+    )
+    callback_url: Optional[HttpUrl] = Field(
+        None,
+        description="Optional http(s) URL that receives an HTTP POST with the job outcome "
+        "when it finishes. Its host must be listed in `job_callback_allowed_hosts`.",
+        example="http://localhost:9000/analysis-done",
+    )
+
+    @field_validator("callback_url")
+    @classmethod
+    def check_callback_host(cls, value: Optional[HttpUrl]) -> Optional[HttpUrl]:
+        """Reject callbacks to hosts outside `job_callback_allowed_hosts`."""
+        if value is not None and not is_allowed_callback_url(str(value)):
+            raise ValueError(
+                f"❌ Callback host '{value.host}' is not allowed. "
+                "Add it to 'job_callback_allowed_hosts'."
+            )
+        return value
+
+
+class ModelRoute(BaseModel):
+    """
+    A single model-routing rule for LLM calls.
+
+    Rules are evaluated in order; the first one whose task and input size match
+    selects the model. Loaded from the `model_routes` environment variable.
+    """
+
+    model: str = Field(..., description="Model name to use when this rule matches.")
+    task: Optional[str] = Field(
+        None, description="Task this rule applies to ('extraction', 'summary'); None matches any."
+    )
+    max_input_tokens: Optional[int] = Field(
+        None, description="Largest input (estimated tokens) this rule accepts; None means unbounded."
+    )
+    timeout: Optional[float] = Field(
+        None, description="Request timeout in seconds for this model."
+    )
+    fallback: Optional[str] = Field(
+        None, description="Model of the tier to fall back to if this one times out."
+    )
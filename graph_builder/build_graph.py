@@ -3,12 +3,32 @@ from langgraph.checkpoint.memory import InMemorySaver
 
 from data_validator.data_valid import BlogBuilderState
 from blog_generator.blog_details import BlogDetails
+from helper_functions.tracing import traced
 
 
 # Instantiate the BlogDetails handler
 blog_details = BlogDetails()
 
 
+class TracedInMemorySaver(InMemorySaver):
+    """
+    InMemorySaver whose checkpoint reads and writes (including serialization)
+    show up as trace spans on traced requests.
+    """
+
+    @traced("checkpoint.get")
+    def get_tuple(self, config):
+        return super().get_tuple(config)
+
+    @traced("checkpoint.put")
+    def put(self, config, checkpoint, metadata, new_versions):
+        return super().put(config, checkpoint, metadata, new_versions)
+
+    @traced("checkpoint.put_writes")
+    def put_writes(self, config, writes, task_id, task_path=""):
+        return super().put_writes(config, writes, task_id, task_path)
+
+
 def build_ad_graph():
     """
     Build and compile the LangGraph workflow for blog/article analysis.
@@ -16,10 +36,12 @@ def build_ad_graph():
     Workflow Steps:
     ---------------
     1. ask_blog_details → Prompt the user to provide a blog/article.
-    2. collect_blog_details → Extract structured details (title, topics, sentiment).
-    3. get_keywords → Extract top keywords (noun frequency-based).
-    4. generate_summary → Generate a concise 1–2 sentence summary.
-    5. END → Mark workflow as complete.
+    2. find_near_duplicate → Reuse a prior analysis of a near-identical article
+       (goes straight to END when one is found).
+    3. collect_blog_details → Extract structured details (title, topics, sentiment).
+    4. get_keywords → Extract top keywords (noun frequency-based).
+    5. generate_summary → Generate a concise 1–2 sentence summary.
+    6. END → Mark workflow as complete.
 
     Returns:
     --------
@@ -30,6 +52,7 @@ def build_ad_graph():
 
     # Register nodes (each step of the pipeline)
     builder.add_node("ask_blog_details", blog_details.ask_blog_details)
+    builder.add_node("find_near_duplicate", blog_details.find_near_duplicate)
     builder.add_node("collect_blog_details", blog_details.collect_blog_details)
     builder.add_node("get_keywords", blog_details.get_keywords)
     builder.add_node("generate_summary", blog_details.generate_summary)
@@ -38,13 +61,18 @@ def build_ad_graph():
     builder.set_entry_point("ask_blog_details")
 
     # Define execution flow (edges between nodes)
-    builder.add_edge("ask_blog_details", "collect_blog_details")
+    builder.add_edge("ask_blog_details", "find_near_duplicate")
+    builder.add_conditional_edges(
+        "find_near_duplicate",
+        blog_details.route_after_duplicate_check,
+        {"collect_blog_details": "collect_blog_details", END: END},
+    )
     builder.add_edge("collect_blog_details", "get_keywords")
     builder.add_edge("get_keywords", "generate_summary")
     builder.add_edge("generate_summary", END)
 
-    # Use in-memory checkpointing (keeps session progress)
-    checkpointer = InMemorySaver()
+    # Use in-memory checkpointing (keeps session progress); reads/writes are traced
+    checkpointer = TracedInMemorySaver()
     graph = builder.compile(checkpointer=checkpointer)
 
     return graph
@@ -1,3 +1,4 @@
+from data.near_duplicate import near_duplicate_index
 from data.postgres_db import PostgreSQL
 
 # Initialize Postgres client
@@ -7,7 +8,7 @@ postgresql = PostgreSQL()
 async def get_actual_ai_message(session_id: str, state: dict):
     """
     Extracts the final AI-generated blog/article analysis from the LangGraph state
-    and persists it to PostgreSQL.
+    and persists it to PostgreSQL (adding the article to the near-duplicate index).
 
     Args:
         session_id (str): Unique session identifier for tracking analysis runs.
@@ -27,14 +28,17 @@ async def get_actual_ai_message(session_id: str, state: dict):
         # If the next step is `collect_blog_details`, try inserting if data is complete
         if state.next[0] == "collect_blog_details":
             if all(k in state[0] for k in required_keys):
-                await postgresql.insert_blog_details(
+                inserted = await postgresql.insert_blog_details(
                     session_id=session_id,
                     title=state[0].get("title"),
                     topics=state[0]["topics"],
                     sentiment=state[0]["sentiment"],
                     summary=state[0]["summary"],
                     keywords=state[0]["keywords"],
+                    minhash=state[0].get("minhash"),
                 )
+                if inserted and state[0].get("minhash"):
+                    near_duplicate_index.add(session_id, state[0]["minhash"])
                 return {
                     "title": state[0].get("title"),
                     "topics": state[0]["topics"],
@@ -50,14 +54,17 @@ async def get_actual_ai_message(session_id: str, state: dict):
 
     # Case 2: Workflow has ended (no `next`) → check if we can persist final result
     if all(k in state[0] for k in required_keys):
-        await postgresql.insert_blog_details(
+        inserted = await postgresql.insert_blog_details(
             session_id=session_id,
             title=state[0].get("title"),
             topics=state[0]["topics"],
             sentiment=state[0]["sentiment"],
             summary=state[0]["summary"],
             keywords=state[0]["keywords"],
+            minhash=state[0].get("minhash"),
         )
+        if inserted and state[0].get("minhash"):
+            near_duplicate_index.add(session_id, state[0]["minhash"])
         return {
             "title": state[0].get("title"),
             "topics": state[0]["topics"],
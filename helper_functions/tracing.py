@@ -0,0 +1,266 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Executor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+# Trace collecting spans for the current request (None when tracing is off)
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+
+
+class Trace:
+    """
+    Collects timed spans (graph nodes, LLM calls, DB queries, checkpointing)
+    for a single request.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.profile: Optional[Dict[str, Any]] = None
+        self.profiler: Optional["SamplingProfiler"] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: total_ms, spans (in completion order) and the profile, if any.
+        """
+        return {
+            "total_ms": round((time.perf_counter() - self.started_at) * 1000, 3),
+            "spans": self.spans,
+            "profile": self.profile,
+        }
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[None]:
+    """
+    Time a block of code as a span of the current request's trace.
+
+    A no-op (one context-variable lookup) when the request is not traced.
+
+    Args:
+        name (str): Span name, e.g. "node.get_keywords", "llm", "db.search_by_topic_or_keyword".
+        **attributes: Extra details recorded with the span (model, task, ...).
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.spans.append(
+            {
+                "name": name,
+                "start_ms": round((started_at - trace.started_at) * 1000, 3),
+                "duration_ms": round((time.perf_counter() - started_at) * 1000, 3),
+                **attributes,
+            }
+        )
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorator recording each call of a sync or async function as a span.
+
+    Args:
+        name (str): Span name.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class SamplingProfiler:
+    """
+    Minimal wall-clock sampling profiler for the threads serving one request.
+
+    A background thread snapshots the target threads' stacks every `interval`
+    seconds; the report lists the functions seen most often, both on top of
+    the stack (self time) and anywhere on it (inclusive time).
+    """
+
+    def __init__(self, thread_ids: Iterable[int] = (), interval: float = 0.005):
+        """
+        Args:
+            thread_ids (Iterable[int]): Threads to sample. Empty by default: request
+                work runs in worker threads that `run_in_thread` registers with
+                `add_thread`, while the event-loop thread mostly idles and also runs
+                other requests' coroutines, which would skew the report.
+            interval (float): Seconds between samples.
+        """
+        self.thread_ids = set(thread_ids)
+        self.interval = interval
+        self.samples = 0
+        self.self_counts: Counter = Counter()
+        self.inclusive_counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def _label(frame) -> str:
+        code = frame.f_code
+        return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+    def add_thread(self, thread_id: int) -> None:
+        """Also sample `thread_id` (e.g. a worker thread running part of the request)."""
+        self.thread_ids = self.thread_ids | {thread_id}
+
+    def remove_thread(self, thread_id: int) -> None:
+        """Stop sampling `thread_id`."""
+        self.thread_ids = self.thread_ids - {thread_id}
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in self.thread_ids:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                self.samples += 1
+                self.self_counts[self._label(frame)] += 1
+                seen = set()
+                while frame is not None:
+                    code = frame.f_code
+                    seen.add(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.inclusive_counts.update(seen)
+
+    def start(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def stop(self, top_n: int = 25) -> Dict[str, Any]:
+        """
+        Stop sampling and summarize.
+
+        Args:
+            top_n (int): Number of entries per list.
+
+        Returns:
+            Dict[str, Any]: interval_ms, samples, and the top self / inclusive
+            functions with sample counts and percentages.
+        """
+        self._stop.set()
+        self._thread.join()
+
+        def top(counts: Counter) -> List[Dict[str, Any]]:
+            return [
+                {
+                    "function": label,
+                    "samples": count,
+                    "percent": round(100 * count / self.samples, 1),
+                }
+                for label, count in counts.most_common(top_n)
+            ]
+
+        return {
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "top_self": top(self.self_counts),
+            "top_inclusive": top(self.inclusive_counts),
+        }
+
+
+@contextmanager
+def request_trace(
+    name: str, trace: bool = False, profile: bool = False
+) -> Iterator[Optional[Trace]]:
+    """
+    Trace (and optionally profile) one request.
+
+    Tracing is on when requested or when the `trace_file` environment variable
+    is set, in which case the trace is also appended to that file as JSON lines.
+    Yields None when neither tracing nor profiling is enabled.
+
+    Args:
+        name (str): Request name recorded in the trace file.
+        trace (bool): Collect spans for this request.
+        profile (bool): Also run the sampling profiler for this request.
+    """
+    trace_file = os.getenv("trace_file")
+    if not (trace or profile or trace_file):
+        yield None
+        return
+
+    current = Trace()
+    token = _current_trace.set(current)
+    profiler = SamplingProfiler().start() if profile else None
+    current.profiler = profiler
+    try:
+        yield current
+    finally:
+        if profiler:
+            current.profile = profiler.stop()
+            current.profiler = None
+        _current_trace.reset(token)
+        if trace_file:
+            try:
+                with open(trace_file, "a") as f:
+                    f.write(json.dumps({"request": name, **current.to_dict()}, default=str) + "\n")
+            except Exception as e:
+                print("❌ Error writing trace file:", e)
+
+
+async def run_in_thread(
+    func: Callable, *args: Any, executor: Optional[Executor] = None, **kwargs: Any
+) -> Any:
+    """
+    `asyncio.to_thread` for blocking work of the current request.
+
+    Spans recorded in the worker thread join the request's trace (the context is
+    copied), and the request's profiler, if any, samples the worker thread too.
+
+    Args:
+        func (Callable): Blocking function, e.g. `graph.invoke`.
+        *args, **kwargs: Passed to `func`.
+        executor (Optional[Executor]): Thread pool to run on. Defaults to the event
+            loop's default executor; long waits (graph runs) should use a dedicated
+            pool so they cannot starve short calls.
+
+    Returns:
+        Any: Whatever `func` returns.
+    """
+    trace = _current_trace.get()
+    profiler = trace.profiler if trace else None
+
+    def run() -> Any:
+        if profiler is None:
+            return func(*args, **kwargs)
+        thread_id = threading.get_ident()
+        profiler.add_thread(thread_id)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.remove_thread(thread_id)
+
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(executor, context.run, run)
@@ -0,0 +1,242 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import httpx
+from langgraph.types import Command
+
+from data.article_store import article_store
+from data.near_duplicate import near_duplicate_index
+from data.postgres_db import PostgreSQL
+from data_validator.data_valid import is_allowed_callback_url
+from graph_builder.build_graph import build_ad_graph
+from helper_functions.tracing import run_in_thread
+from llm_models.llm import PRIORITY_BATCH
+
+
+class JobWorker:
+    """
+    Runs queued analysis jobs from the 'analysis_jobs' table through the LangGraph pipeline.
+
+    Responsibilities:
+    - Poll Postgres for queued jobs (safe to run many workers across processes).
+    - Run each job's article through `build_ad_graph` at batch LLM priority.
+    - Persist the analysis to 'blog_details' and record the job outcome, only while
+      this worker still holds the job's claim (see `claim_next_job`).
+    - Notify the job's callback URL (if any, and allowed) when it finishes.
+
+    Configuration (environment variables):
+        job_worker_concurrency (default 2): jobs processed in parallel by this worker.
+        job_poll_interval_seconds (default 1): sleep between polls when the queue is empty.
+        job_lease_seconds (default 600): after this long a 'running' job is reclaimed.
+        job_max_attempts (default 3): claims allowed before a job is marked failed.
+    """
+
+    required_keys = ["topics", "sentiment", "summary", "keywords"]
+
+    def __init__(self, graph=None, concurrency: Optional[int] = None):
+        """
+        Args:
+            graph: Compiled LangGraph workflow. Builds a new one if omitted.
+            concurrency (Optional[int]): Parallel jobs; defaults to `job_worker_concurrency`.
+        """
+        self.graph = graph or build_ad_graph()
+        self.concurrency = concurrency or int(os.getenv("job_worker_concurrency", 2))
+        self.poll_interval = float(os.getenv("job_poll_interval_seconds", 1))
+        self.lease_seconds = float(os.getenv("job_lease_seconds", 600))
+        self.max_attempts = int(os.getenv("job_max_attempts", 3))
+        # Graph runs wait on the LLM scheduler; keep them off the default executor
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="job-graph"
+        )
+
+    async def run_job(self, job: Dict[str, Any]) -> None:
+        """
+        Analyze a claimed job's article and record the outcome.
+
+        While the job runs, a heartbeat renews its lease so slow analyses (batch
+        priority waits behind interactive traffic) are not reclaimed. If the lease
+        is lost anyway and another worker reclaims the job, this worker's outcome
+        is dropped: no analysis row, no status update, no callback.
+
+        Each claim runs on its own graph thread, deleted once the outcome is
+        recorded, so a long-running worker does not accumulate checkpoints.
+
+        Args:
+            job (Dict[str, Any]): Claimed job with job_id, user_input, callback_url, attempts.
+        """
+        if job["attempts"] > self.max_attempts:
+            await self._finish(
+                PostgreSQL(), job, "failed", error="Job exceeded the maximum number of attempts."
+            )
+            return
+
+        thread_id = f"{job['job_id']}:{job['attempts']}"
+        config = {"configurable": {"thread_id": thread_id, "priority": PRIORITY_BATCH}}
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        article_ref = None
+        try:
+            try:
+                article_ref = await asyncio.to_thread(article_store.put, job["user_input"])
+            except Exception as e:
+                await self._finish(
+                    PostgreSQL(), job, "failed", error=f"Storing the article failed: {str(e)}"
+                )
+                return
+            await self._analyze(job, config, article_ref)
+        finally:
+            heartbeat.cancel()
+            self.graph.checkpointer.delete_thread(thread_id)
+            if article_ref:
+                article_store.release(article_ref)
+
+    async def _analyze(
+        self, job: Dict[str, Any], config: Dict[str, Any], article_ref: str
+    ) -> None:
+        """Run the graph for a claimed job and record the outcome."""
+        # One connection holder per job: PostgreSQL keeps a single connection attribute
+        postgresql = PostgreSQL()
+        job_id = job["job_id"]
+
+        try:
+            # The graph is synchronous; keep the event loop free while it runs
+            await run_in_thread(self.graph.invoke, {}, config, executor=self.executor)
+            result = await run_in_thread(
+                self.graph.invoke, Command(resume=article_ref), config, executor=self.executor
+            )
+            values = self.graph.get_state(config).values
+        except Exception as e:
+            await self._finish(postgresql, job, "failed", error=f"Analysis failed: {str(e)}")
+            return
+
+        if result.get("__interrupt__") or not all(k in values for k in self.required_keys):
+            interrupts = result.get("__interrupt__")
+            message = interrupts[0].value if interrupts else "Analysis did not complete."
+            await self._finish(postgresql, job, "failed", error=message)
+            return
+
+        analysis = {
+            "title": values.get("title"),
+            "topics": values["topics"],
+            "sentiment": values["sentiment"],
+            "summary": values["summary"],
+            "keywords": values["keywords"],
+        }
+        try:
+            completed = await postgresql.complete_job(
+                job_id, job["attempts"], analysis, minhash=values.get("minhash")
+            )
+        except Exception as e:
+            await self._finish(
+                postgresql, job, "failed", error=f"Saving the analysis failed: {str(e)}"
+            )
+            return
+
+        if not completed:
+            print(f"❌ Lost the claim on job {job_id}; another worker is running it.")
+            return
+        if values.get("minhash"):
+            near_duplicate_index.add(job_id, values["minhash"])
+        await self._notify(job, "done", result=analysis)
+
+    async def _heartbeat(self, job: Dict[str, Any]) -> None:
+        """Renew the job's lease every third of `job_lease_seconds` until cancelled."""
+        postgresql = PostgreSQL()
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await postgresql.renew_job_lease(job["job_id"], job["attempts"])
+            except Exception as e:
+                print(f"❌ Error renewing the lease on job {job['job_id']}:", e)
+                continue
+            if not renewed:
+                print(f"❌ Lost the claim on job {job['job_id']}; stopping its heartbeat.")
+                return
+
+    async def _finish(
+        self,
+        postgresql: PostgreSQL,
+        job: Dict[str, Any],
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """Record the job outcome; notify its callback URL if this worker still held the claim."""
+        recorded = await postgresql.finish_job(
+            job["job_id"], job["attempts"], status, result=result, error=error
+        )
+        if recorded:
+            await self._notify(job, status, result=result, error=error)
+
+    async def _notify(
+        self,
+        job: Dict[str, Any],
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """POST the job outcome to its callback URL (if any, and still allowed)."""
+        callback_url = job.get("callback_url")
+        if not callback_url:
+            return
+        if not is_allowed_callback_url(callback_url):
+            print(f"❌ Callback host for job {job['job_id']} is not allowed; skipping.")
+            return
+
+        payload = {"job_id": job["job_id"], "status": status, "result": result, "error": error}
+        try:
+            async with httpx.AsyncClient(timeout=10, follow_redirects=False) as client:
+                response = await client.post(callback_url, json=payload)
+                response.raise_for_status()
+        except Exception as e:
+            print(f"❌ Error notifying callback for job {job['job_id']}:", e)
+
+    async def _worker_loop(self) -> None:
+        """Claim and run jobs until cancelled."""
+        postgresql = PostgreSQL()
+        while True:
+            job = await postgresql.claim_next_job(self.lease_seconds)
+            if job is None:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            try:
+                await self.run_job(job)
+            except Exception as e:
+                print(f"❌ Error running job {job['job_id']}:", e)
+
+    async def run_forever(self) -> None:
+        """
+        Ensure the jobs, stats and minhash tables exist, load the near-duplicate
+        index and keep it refreshed, then run `concurrency` worker loops until cancelled.
+        """
+        await PostgreSQL().ensure_jobs_table()
+        await PostgreSQL().ensure_stats_tables()
+        await PostgreSQL().ensure_minhash_table()
+        if not near_duplicate_index.refreshed:
+            await asyncio.to_thread(near_duplicate_index.refresh)
+        near_duplicate_index.start_refresh_loop()
+        # A failing loop cancels its siblings, so a restart never doubles them
+        async with asyncio.TaskGroup() as group:
+            for _ in range(self.concurrency):
+                group.create_task(self._worker_loop())
+
+    async def run_supervised(self, restart_delay: float = 5) -> None:
+        """
+        Run `run_forever`, logging failures (e.g. the database is unreachable at
+        boot) and restarting after `restart_delay` seconds, until cancelled.
+        """
+        while True:
+            try:
+                await self.run_forever()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Job worker stopped ({e}); restarting in {restart_delay}s.")
+                await asyncio.sleep(restart_delay)
+
+
+# ---------- RUN STANDALONE WORKER ----------
+
+if __name__ == "__main__":
+    asyncio.run(JobWorker().run_supervised())
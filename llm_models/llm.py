@@ -1,18 +1,458 @@
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import heapq
+import itertools
+import json
 import os
-from data_validator.data_valid import BlogDetails
+import random
+import threading
+import time
+from data_validator.data_valid import BlogDetails, ModelRoute
+from helper_functions.tracing import span
 
 # Load environment variables
 load_dotenv()
 
 
+# Scheduling priorities (lower value is served first)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# LLM tasks used for model routing
+TASK_EXTRACTION = "extraction"
+TASK_SUMMARY = "summary"
+
+# Errors worth retrying: throttling, timeouts and transient server failures
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheaply estimate the number of tokens in a piece of text.
+
+    Uses the ~4 characters per token rule of thumb, which is close enough for
+    rate-limit budgeting without loading a tokenizer.
+
+    Args:
+        text (str): Prompt or article text.
+
+    Returns:
+        int: Estimated token count (at least 1).
+    """
+    return max(1, len(text or "") // 4)
+
+
+class TokenBucket:
+    """
+    Classic token bucket used to enforce a per-minute budget.
+
+    The bucket holds at most `capacity` tokens and refills continuously at
+    `capacity / 60` tokens per second. Not thread-safe on its own; the
+    LLMScheduler guards it with its condition lock.
+    """
+
+    def __init__(self, per_minute: float):
+        """
+        Args:
+            per_minute (float): Budget replenished every minute (also the burst size).
+        """
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Seconds until `amount` tokens are available (0 if available now).
+
+        Requests larger than the bucket are clamped to its capacity so they
+        can still be served once the bucket is full.
+        """
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        """Remove `amount` tokens from the bucket (clamped to its capacity)."""
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the provider reported a 429."""
+        self._refill()
+        self.tokens = 0.0
+
+
+class LLMScheduler:
+    """
+    Shared, process-wide gate in front of every LLM call.
+
+    Responsibilities:
+    - Enforce requests-per-minute and tokens-per-minute budgets (token buckets).
+    - Queue calls by priority (interactive sessions ahead of batch work), FIFO within a priority.
+    - Retry throttled / transient failures with jittered exponential backoff.
+    - Adapt the concurrency limit to observed latency and errors (AIMD).
+    - Report queue depth, wait times and call outcomes via `stats()`.
+
+    Calls run on the caller's thread; the scheduler only decides *when* they may start.
+
+    Configuration (environment variables):
+        llm_requests_per_minute (default 500)
+        llm_tokens_per_minute (default 200000)
+        llm_max_concurrency (default 16)
+        llm_target_latency_seconds (default 15)
+        llm_max_retries (default 4)
+        llm_backoff_base_seconds (default 0.5)
+        llm_backoff_max_seconds (default 30)
+    """
+
+    def __init__(self):
+        self.request_bucket = TokenBucket(float(os.getenv("llm_requests_per_minute", 500)))
+        self.token_bucket = TokenBucket(float(os.getenv("llm_tokens_per_minute", 200000)))
+        self.max_concurrency = int(os.getenv("llm_max_concurrency", 16))
+        self.target_latency = float(os.getenv("llm_target_latency_seconds", 15))
+        self.max_retries = int(os.getenv("llm_max_retries", 4))
+        self.backoff_base = float(os.getenv("llm_backoff_base_seconds", 0.5))
+        self.backoff_max = float(os.getenv("llm_backoff_max_seconds", 30))
+
+        self._condition = threading.Condition()
+        self._queue: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        # Start halfway and let AIMD find the sustainable level
+        self._concurrency_limit = max(1.0, self.max_concurrency / 2)
+
+        self._completed = 0
+        self._failed = 0
+        self._retries = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._admitted = 0
+        self._latency_ewma: Optional[float] = None
+
+    # ---------- admission ----------
+
+    def _acquire(self, tokens: int, priority: int) -> float:
+        """
+        Block until this call is at the head of the queue and within all budgets.
+
+        Returns:
+            float: Seconds spent waiting in the queue.
+        """
+        entry = (priority, next(self._sequence))
+        enqueued_at = time.monotonic()
+
+        with self._condition:
+            heapq.heappush(self._queue, entry)
+            while True:
+                timeout = None
+                if self._queue[0] == entry and self._in_flight < int(self._concurrency_limit):
+                    timeout = max(
+                        self.request_bucket.wait_time(1),
+                        self.token_bucket.wait_time(tokens),
+                    )
+                    if timeout == 0:
+                        break
+                self._condition.wait(timeout)
+
+            heapq.heappop(self._queue)
+            self.request_bucket.consume(1)
+            self.token_bucket.consume(tokens)
+            self._in_flight += 1
+
+            waited = time.monotonic() - enqueued_at
+            self._admitted += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+            # The next caller in line may now be eligible
+            self._condition.notify_all()
+
+        return waited
+
+    def _release(self) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    # ---------- adaptation ----------
+
+    def _on_success(self, latency: float) -> None:
+        with self._condition:
+            self._completed += 1
+            if self._latency_ewma is None:
+                self._latency_ewma = latency
+            else:
+                self._latency_ewma = 0.8 * self._latency_ewma + 0.2 * latency
+
+            if self._latency_ewma <= self.target_latency:
+                # Additive increase: roughly +1 slot per window of successful calls
+                self._concurrency_limit = min(
+                    float(self.max_concurrency),
+                    self._concurrency_limit + 1.0 / self._concurrency_limit,
+                )
+            else:
+                # Latency is degrading: back off gently
+                self._concurrency_limit = max(1.0, self._concurrency_limit * 0.9)
+            self._condition.notify_all()
+
+    def _on_error(self, error: Exception) -> None:
+        with self._condition:
+            # Multiplicative decrease on throttling / transient failures
+            self._concurrency_limit = max(1.0, self._concurrency_limit * 0.5)
+            if isinstance(error, RateLimitError):
+                # Our budget is out of sync with the provider's; start the minute over
+                self.request_bucket.drain()
+                self.token_bucket.drain()
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, honouring a provider `retry-after` hint."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2**attempt)))
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            delay = max(delay, float(retry_after)) if retry_after else delay
+        except ValueError:
+            pass
+        return min(delay, self.backoff_max)
+
+    # ---------- public API ----------
+
+    def run(
+        self,
+        call: Callable[[], Any],
+        tokens: int = 1,
+        priority: int = PRIORITY_INTERACTIVE,
+        retry_timeouts: bool = True,
+    ) -> Any:
+        """
+        Run an LLM call once it is admitted by the scheduler, retrying transient failures.
+
+        Args:
+            call (Callable[[], Any]): Zero-argument function performing the LLM request.
+            tokens (int): Estimated tokens the call will consume (see `estimate_tokens`).
+            priority (int): PRIORITY_INTERACTIVE or PRIORITY_BATCH (lower runs first).
+            retry_timeouts (bool): If False, timeouts are raised immediately (e.g. so the
+                caller can fall back to another model) instead of being retried.
+
+        Returns:
+            Any: Whatever `call` returns.
+
+        Raises:
+            Exception: The last error if retries are exhausted, or any non-retryable error.
+        """
+        attempt = 0
+        while True:
+            with span("llm.queue_wait", priority=priority):
+                self._acquire(tokens, priority)
+            started_at = time.monotonic()
+            try:
+                result = call()
+            except RETRYABLE_ERRORS as e:
+                self._release()
+                if isinstance(e, APITimeoutError) and not retry_timeouts:
+                    # An expected hand-off to the caller's fallback model, not a
+                    # sign of overload: leave the concurrency limit alone
+                    with self._condition:
+                        self._failed += 1
+                    raise
+                self._on_error(e)
+                if attempt >= self.max_retries:
+                    with self._condition:
+                        self._failed += 1
+                    raise
+                with self._condition:
+                    self._retries += 1
+                time.sleep(self._backoff(attempt, e))
+                attempt += 1
+                continue
+            except Exception:
+                self._release()
+                with self._condition:
+                    self._failed += 1
+                raise
+
+            self._release()
+            self._on_success(time.monotonic() - started_at)
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of the scheduler's queue and health.
+
+        Returns:
+            Dict[str, Any]: queue_depth, in_flight, concurrency_limit, average/max
+            queue wait (seconds), completed/failed/retried call counts and the
+            latency moving average.
+        """
+        with self._condition:
+            return {
+                "queue_depth": len(self._queue),
+                "in_flight": self._in_flight,
+                "concurrency_limit": int(self._concurrency_limit),
+                "avg_wait_seconds": (
+                    self._total_wait / self._admitted if self._admitted else 0.0
+                ),
+                "max_wait_seconds": self._max_wait,
+                "completed": self._completed,
+                "failed": self._failed,
+                "retries": self._retries,
+                "latency_ewma_seconds": self._latency_ewma,
+            }
+
+
+class ModelRouter:
+    """
+    Picks a model per LLM call based on the task and the input size.
+
+    Rules come from the `model_routes` environment variable, a JSON list of
+    ModelRoute objects evaluated in order, e.g.:
+
+        [
+            {"task": "extraction", "max_input_tokens": 2000, "model": "gpt-4.1-nano",
+             "timeout": 10, "fallback": "gpt-4.1-mini"},
+            {"max_input_tokens": 30000, "model": "gpt-4.1-mini", "timeout": 30,
+             "fallback": "gpt-4.1"},
+            {"model": "gpt-4.1", "timeout": 90}
+        ]
+
+    Without `model_routes`, every call uses `model_name`. Per-model (tier)
+    latency and usage metrics are kept so the routing can be evaluated.
+    """
+
+    def __init__(self, default_model: Optional[str] = None):
+        """
+        Args:
+            default_model (Optional[str]): Model used when no rule matches
+                (defaults to the `model_name` environment variable).
+
+        Raises:
+            ValueError: If `model_routes` is not a valid JSON list of routes.
+        """
+        self.default_model = default_model or os.getenv("model_name")
+        raw_routes = os.getenv("model_routes")
+        try:
+            self.routes = [ModelRoute(**r) for r in json.loads(raw_routes)] if raw_routes else []
+        except Exception as e:
+            raise ValueError(f"❌ Invalid 'model_routes' configuration: {str(e)}") from e
+
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, float]] = {}
+
+    def _find(self, model: str) -> ModelRoute:
+        """Return the first rule for `model` (for its timeout), or a bare route."""
+        for route in self.routes:
+            if route.model == model:
+                return route
+        return ModelRoute(model=model)
+
+    def route(self, task: str, input_tokens: int) -> List[ModelRoute]:
+        """
+        Select the model for a call, followed by its fallback tiers.
+
+        Args:
+            task (str): TASK_EXTRACTION or TASK_SUMMARY.
+            input_tokens (int): Estimated input size in tokens.
+
+        Returns:
+            List[ModelRoute]: The matching route first, then each fallback tier in order.
+        """
+        selected = ModelRoute(model=self.default_model)
+        for route in self.routes:
+            if route.task not in (None, task):
+                continue
+            if route.max_input_tokens is not None and input_tokens > route.max_input_tokens:
+                continue
+            selected = route
+            break
+
+        chain = [selected]
+        seen = {selected.model}
+        while chain[-1].fallback and chain[-1].fallback not in seen:
+            seen.add(chain[-1].fallback)
+            chain.append(self._find(chain[-1].fallback))
+        return chain
+
+    def record(
+        self,
+        model: str,
+        task: str,
+        latency: float,
+        input_tokens: int,
+        outcome: str,
+        queue_wait: float = 0.0,
+    ) -> None:
+        """
+        Record the outcome of one call on a tier.
+
+        Args:
+            model (str): Model (tier) that served the call.
+            task (str): Task of the call.
+            latency (float): Seconds the model took to answer (or time out) on the last attempt.
+            input_tokens (int): Estimated input tokens.
+            outcome (str): 'success', 'timeout' or 'error'.
+            queue_wait (float): Seconds spent in the scheduler instead (queueing and
+                retry backoff), kept apart so latency reflects the model alone.
+        """
+        with self._lock:
+            metrics = self._metrics.setdefault(
+                model,
+                {"calls": 0, "success": 0, "timeout": 0, "error": 0,
+                 "input_tokens": 0, "total_latency_seconds": 0.0,
+                 "max_latency_seconds": 0.0, "total_queue_wait_seconds": 0.0},
+            )
+            metrics["calls"] += 1
+            metrics[outcome] += 1
+            metrics["input_tokens"] += input_tokens
+            metrics["total_latency_seconds"] += latency
+            metrics["max_latency_seconds"] = max(metrics["max_latency_seconds"], latency)
+            metrics["total_queue_wait_seconds"] += queue_wait
+            metrics[f"task_{task}"] = metrics.get(f"task_{task}", 0) + 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-tier usage and latency metrics.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Keyed by model name; includes call counts per
+            outcome and task, input tokens, average / max model latency and
+            average scheduler wait.
+        """
+        with self._lock:
+            return {
+                model: {
+                    **metrics,
+                    "avg_latency_seconds": metrics["total_latency_seconds"] / metrics["calls"],
+                    "avg_queue_wait_seconds": (
+                        metrics["total_queue_wait_seconds"] / metrics["calls"]
+                    ),
+                }
+                for model, metrics in self._metrics.items()
+            }
+
+
+# Shared scheduler for every LLM call made by this process
+llm_scheduler = LLMScheduler()
+
+# Shared model router (per-tier metrics are process-wide)
+model_router = ModelRouter()
+
+
 class LLMHandler:
     """
     Handles interaction with OpenAI's GPT models using LangChain's ChatOpenAI class.
     Provides methods to obtain configured LLMs for analyzing blog or article text:
     - Raw LLM for general-purpose usage
     - Structured LLM for extracting BlogDetails (title, topics, sentiment, keywords, summary)
+    - Scheduled, routed invocation through the shared LLMScheduler and ModelRouter
 
     Uses environment variables for API configuration.
     """
@@ -34,10 +474,16 @@ class LLMHandler:
                 "❌ OpenAI API key and model name must be provided in environment variables."
             )
 
-    def get_llm(self):
+    def get_llm(self, model_name: Optional[str] = None, timeout: Optional[float] = None):
         """
         Creates and returns a general ChatOpenAI instance.
 
+        Client-side retries are disabled because the LLMScheduler owns retrying.
+
+        Args:
+            model_name (Optional[str]): Model to use. Defaults to `self.model_name`.
+            timeout (Optional[float]): Request timeout in seconds. Defaults to the client default.
+
         Returns:
             ChatOpenAI: Instance configured with the API key and model name.
 
@@ -45,17 +491,26 @@ class LLMHandler:
             RuntimeError: If the LLM instantiation fails.
         """
         try:
-            return ChatOpenAI(model_name=self.model_name, openai_api_key=self.api_key)
+            return ChatOpenAI(
+                model_name=model_name or self.model_name,
+                openai_api_key=self.api_key,
+                max_retries=0,
+                timeout=timeout,
+            )
         except Exception as e:
             raise RuntimeError(f"❌ Failed to initialize LLM: {str(e)}") from e
 
-    def blog_llm(self):
+    def blog_llm(self, model_name: Optional[str] = None, timeout: Optional[float] = None):
         """
         Returns a ChatOpenAI instance configured for structured blog analysis.
 
         The returned model outputs structured JSON matching the BlogDetails schema
         (title, topics, sentiment, keywords, summary).
 
+        Args:
+            model_name (Optional[str]): Model to use. Defaults to `self.model_name`.
+            timeout (Optional[float]): Request timeout in seconds.
+
         Returns:
             ChatOpenAI: An instance set up to produce structured BlogDetails output.
 
@@ -63,8 +518,78 @@ class LLMHandler:
             RuntimeError: If the structured LLM instantiation fails.
         """
         try:
-            return self.get_llm().with_structured_output(BlogDetails)
+            return self.get_llm(model_name, timeout).with_structured_output(BlogDetails)
         except Exception as e:
             raise RuntimeError(
                 f"❌ Failed to initialize BlogDetails LLM: {str(e)}"
             ) from e
+
+    def invoke(
+        self,
+        prompt: str,
+        task: str = TASK_SUMMARY,
+        structured: bool = False,
+        priority: int = PRIORITY_INTERACTIVE,
+    ):
+        """
+        Invoke the LLM through the shared scheduler (rate limits, priority, retries),
+        using the model the ModelRouter selects for this task and input size.
+
+        If the selected tier times out, the call falls back to the next tier.
+
+        Args:
+            prompt (str): Prompt to send.
+            task (str): TASK_EXTRACTION or TASK_SUMMARY (used for routing).
+            structured (bool): If True, use the BlogDetails structured-output LLM.
+            priority (int): PRIORITY_INTERACTIVE or PRIORITY_BATCH.
+
+        Returns:
+            BlogDetails | AIMessage: Structured details or the raw chat message.
+
+        Raises:
+            APITimeoutError: If every tier timed out.
+        """
+        tokens = estimate_tokens(prompt)
+        routes = model_router.route(task, tokens)
+
+        for index, route in enumerate(routes):
+            llm = (self.blog_llm if structured else self.get_llm)(route.model, route.timeout)
+            has_fallback = index < len(routes) - 1
+
+            # Time the model call itself; the rest of the wall clock is scheduler wait
+            model_times: List[float] = []
+
+            def call(llm=llm):
+                call_started_at = time.monotonic()
+                try:
+                    return llm.invoke(prompt)
+                finally:
+                    model_times.append(time.monotonic() - call_started_at)
+
+            started_at = time.monotonic()
+
+            def record(outcome: str) -> None:
+                latency = model_times[-1] if model_times else 0.0
+                queue_wait = time.monotonic() - started_at - sum(model_times)
+                model_router.record(route.model, task, latency, tokens, outcome, queue_wait)
+
+            try:
+                with span("llm", model=route.model, task=task, input_tokens=tokens):
+                    result = llm_scheduler.run(
+                        call,
+                        tokens=tokens,
+                        priority=priority,
+                        # Timeouts go to the next tier instead of being retried on this one
+                        retry_timeouts=not has_fallback,
+                    )
+            except APITimeoutError:
+                record("timeout")
+                if not has_fallback:
+                    raise
+                continue
+            except Exception:
+                record("error")
+                raise
+
+            record("success")
+            return result
@@ -1,13 +1,63 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, HTTPException, Query, Request
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 import uvicorn
 import uuid
 from langgraph.types import Command
+from data.article_store import article_store
+from data.near_duplicate import near_duplicate_index
 from data.postgres_db import PostgreSQL
 from graph_builder.build_graph import build_ad_graph
-from llm_models.llm import LLMHandler
-from data_validator.data_valid import ChatRequest
+from llm_models.llm import LLMHandler, llm_scheduler, model_router
+from data_validator.data_valid import ChatRequest, JobRequest
 from helper_functions.extract_results import get_actual_ai_message
-from models import AnalyzeResponse, SearchResponse
+from helper_functions.tracing import request_trace, run_in_thread
+from job_queue.job_worker import JobWorker
+from models import (
+    AnalyzeResponse,
+    SearchResponse,
+    StatsResponse,
+    LLMStatsResponse,
+    JobResponse,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Prepare the jobs, stats and near-duplicate tables, load the near-duplicate
+    index, and run in-process job workers alongside the API.
+
+    Set `api_job_workers=0` to leave job processing to standalone workers
+    (`python -m job_queue.job_worker`) that scale independently.
+    """
+    try:
+        await PostgreSQL().ensure_jobs_table()
+        await PostgreSQL().ensure_stats_tables()
+        await PostgreSQL().ensure_minhash_table()
+    except Exception as e:
+        print("❌ Error preparing the jobs, stats and near-duplicate tables:", e)
+
+    # Load the near-duplicate index before serving requests, then keep it fresh
+    # in the background so lookups never wait on the database
+    await asyncio.to_thread(near_duplicate_index.refresh)
+    refresh_task = near_duplicate_index.start_refresh_loop()
+
+    worker_task = None
+    api_job_workers = int(os.getenv("api_job_workers", 1))
+    if api_job_workers > 0:
+        # Supervised: failures are logged and the workers restart
+        worker_task = asyncio.create_task(
+            JobWorker(graph, concurrency=api_job_workers).run_supervised()
+        )
+    yield
+    for task in (worker_task, refresh_task):
+        if task:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
 
 
 app = FastAPI(
@@ -15,6 +65,7 @@ app = FastAPI(
     description="API for analyzing blog/ad content using LLMs and LangGraph. "
     "Supports session-based interactions, structured extraction, and keyword/topic search.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 graph = build_ad_graph()
@@ -28,41 +79,34 @@ postgresql = PostgreSQL()
 graph = build_ad_graph()
 SESSIONS: dict = {}
 
+# Graph runs block while the LLM scheduler queues them, so they get their own
+# pool: a burst of waiting analyses cannot starve the short calls on the default
+# executor, and each one reaches the scheduler's priority queue without waiting
+# behind unrelated work.
+graph_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("api_graph_threads", 64)), thread_name_prefix="graph"
+)
 
-@app.post(
-    "/analyze",
-    response_model=AnalyzeResponse,
-    summary="Analyze or Continue Analysis",
-    description="""
-Start or continue an analysis session on blog/article input.
 
-- **New session:** Omit `session_id`. The server will return a new session with a prompt for input.
-- **Continue session:** Provide an existing `session_id` along with `user_input`.
+async def run_analysis(request: ChatRequest) -> AnalyzeResponse:
+    """
+    Start or resume an analysis session (body of POST /analyze).
 
-The LLM + graph will extract:
-- Title (if available)
-- Topics (3 key topics)
-- Sentiment (positive / neutral / negative)
-- Summary
-- Keywords
-    """,
-    responses={
-        200: {"description": "Analysis processed successfully"},
-        404: {"description": "Invalid session_id"},
-        500: {"description": "LLM or processing failure"},
-    },
-)
-async def chat_endpoint(request: ChatRequest):
+    The graph is synchronous and may wait on the LLM scheduler (queueing, rate-limit
+    refills, retry backoff), so it runs on `graph_executor` to keep the event loop free.
+    """
     try:
         # Start new session
         if request.session_id is None:
             session_id = str(uuid.uuid4())
             config = {"configurable": {"thread_id": session_id}}
 
-            result = graph.invoke({}, config=config)
+            result = await run_in_thread(
+                graph.invoke, {}, config=config, executor=graph_executor
+            )
             SESSIONS[session_id] = config
 
-            state = graph.get_state(config)
+            state = await run_in_thread(graph.get_state, config)
             return AnalyzeResponse(
                 session_id=session_id,
                 status="awaiting_user_input",
@@ -76,9 +120,17 @@ async def chat_endpoint(request: ChatRequest):
             raise HTTPException(status_code=404, detail="Invalid session_id")
 
         config = SESSIONS[session_id]
-        cmd = Command(resume=request.user_input or "")
-        result = graph.invoke(cmd, config=config)
-        state = graph.get_state(config)
+        # Store the article once; the graph only carries its reference
+        article_ref = (
+            await run_in_thread(article_store.put, request.user_input)
+            if request.user_input
+            else ""
+        )
+        cmd = Command(resume=article_ref)
+        result = await run_in_thread(
+            graph.invoke, cmd, config=config, executor=graph_executor
+        )
+        state = await run_in_thread(graph.get_state, config)
 
         if not result.get("__interrupt__"):
             node = await get_actual_ai_message(session_id, state)
@@ -102,6 +154,55 @@ async def chat_endpoint(request: ChatRequest):
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
+@app.post(
+    "/analyze",
+    response_model=AnalyzeResponse,
+    summary="Analyze or Continue Analysis",
+    description="""
+Start or continue an analysis session on blog/article input.
+
+- **New session:** Omit `session_id`. The server will return a new session with a prompt for input.
+- **Continue session:** Provide an existing `session_id` along with `user_input`.
+
+The LLM + graph will extract:
+- Title (if available)
+- Topics (3 key topics)
+- Sentiment (positive / neutral / negative)
+- Summary
+- Keywords
+
+**Debugging:** add `?debug=true` (or header `X-Debug: 1`) to get per-step trace
+spans (graph nodes, LLM calls, DB queries, checkpoint serialization) in the
+`debug` field, and `?profile=true` (or `X-Profile: 1`) to also include a
+sampling profile of the graph run. Profiling is only honoured when the server
+sets `api_profiling_enabled=true`.
+    """,
+    responses={
+        200: {"description": "Analysis processed successfully"},
+        404: {"description": "Invalid session_id"},
+        500: {"description": "LLM or processing failure"},
+    },
+)
+async def chat_endpoint(
+    request: ChatRequest,
+    http_request: Request,
+    debug: bool = False,
+    profile: bool = False,
+):
+    # Opt-in tracing / profiling via query flags or headers
+    profile = profile or http_request.headers.get("x-profile", "").lower() in ("1", "true")
+    # Profiles expose internal file and function names; operators opt in
+    profile = profile and os.getenv("api_profiling_enabled", "false").lower() == "true"
+    debug = debug or profile or http_request.headers.get("x-debug", "").lower() in ("1", "true")
+
+    with request_trace("analyze", trace=debug, profile=profile) as trace:
+        response = await run_analysis(request)
+
+    if debug:
+        response.debug = trace.to_dict()
+    return response
+
+
 @app.get(
     "/search",
     response_model=SearchResponse,
@@ -137,6 +238,101 @@ async def search(topic: str):
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 
+@app.get(
+    "/stats",
+    response_model=StatsResponse,
+    summary="Topic and Sentiment Trends",
+    description="""
+Return trend statistics across all stored analyses:
+- Top topics and keywords
+- Sentiment distribution per top topic
+- Daily analysis volume
+
+Served from incrementally maintained aggregate tables, so the cost does not
+grow with the number of stored analyses. Rebuild them with
+`python -m data.backfill_stats`.
+    """,
+    responses={
+        200: {"description": "Statistics returned"},
+        422: {"description": "top_n or days out of range"},
+        500: {"description": "Database or query failure"},
+    },
+)
+async def stats(
+    top_n: int = Query(10, ge=1, le=100, description="Number of top topics / keywords"),
+    days: int = Query(30, ge=1, le=366, description="Days of daily volume"),
+):
+    try:
+        return StatsResponse(**await PostgreSQL().get_stats(top_n=top_n, days=days))
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Stats failed: {str(e)}")
+
+
+@app.post(
+    "/jobs",
+    response_model=JobResponse,
+    status_code=202,
+    summary="Enqueue Analysis Job",
+    description="""
+Enqueue an analysis of the given article and return a job id immediately.
+
+Poll `GET /jobs/{job_id}` for the status and result, or provide `callback_url`
+to receive an HTTP POST with `{job_id, status, result, error}` when the job finishes.
+The callback host must be listed in `job_callback_allowed_hosts`.
+    """,
+    responses={
+        202: {"description": "Job enqueued"},
+        400: {"description": "Empty input"},
+        422: {"description": "Invalid or disallowed callback_url"},
+        500: {"description": "Database failure"},
+    },
+)
+async def create_job(request: JobRequest):
+    if not request.user_input.strip():
+        raise HTTPException(status_code=400, detail="user_input must not be empty")
+
+    # Fresh client per call: PostgreSQL keeps a single connection attribute
+    callback_url = str(request.callback_url) if request.callback_url else None
+    job_id = await PostgreSQL().create_job(str(uuid.uuid4()), request.user_input, callback_url)
+    if job_id is None:
+        raise HTTPException(status_code=500, detail="Failed to enqueue job")
+
+    return JobResponse(job_id=job_id, status="queued")
+
+
+@app.get(
+    "/jobs/{job_id}",
+    response_model=JobResponse,
+    summary="Get Analysis Job",
+    description="Return the status of an analysis job and its result once done.",
+    responses={
+        200: {"description": "Job found"},
+        404: {"description": "Unknown job_id"},
+    },
+)
+async def get_job(job_id: str):
+    job = await PostgreSQL().get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Invalid job_id")
+
+    return JobResponse(**job)
+
+
+@app.get(
+    "/llm/stats",
+    response_model=LLMStatsResponse,
+    summary="LLM Scheduler Statistics",
+    description="""
+Report the shared LLM scheduler's queue depth, wait times, adaptive
+concurrency limit and call outcomes (completed / failed / retried),
+plus per-model routing tier usage and latency.
+    """,
+)
+async def llm_stats():
+    return LLMStatsResponse(**llm_scheduler.stats(), tiers=model_router.stats())
+
+
 # ---------- RUN SERVER ----------
 
 if __name__ == "__main__":
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import List, Optional, Dict, Any, Tuple, Union
 
 from pydantic import BaseModel, Field
@@ -21,6 +22,9 @@ class AnalyzeResponse(BaseModel):
     ai_message: Optional[Dict[str, Any]] = Field(
         None, description="Final structured AI analysis results"
     )
+    debug: Optional[Dict[str, Any]] = Field(
+        None, description="Trace spans and profile, when requested with debug/profile"
+    )
 
 
 class SearchResponse(BaseModel):
@@ -32,3 +36,60 @@ class SearchResponse(BaseModel):
     message: Optional[str] = Field(
         None, description="Error or info message if no results found"
     )
+
+
+class StatsResponse(BaseModel):
+    top_topics: List[Dict[str, Any]] = Field(
+        ..., description="Most frequent topics as {topic, count}"
+    )
+    top_keywords: List[Dict[str, Any]] = Field(
+        ..., description="Most frequent keywords as {keyword, count}"
+    )
+    sentiment_by_topic: Dict[str, Dict[str, int]] = Field(
+        ..., description="Sentiment distribution for each top topic"
+    )
+    daily_volume: List[Dict[str, Any]] = Field(
+        ..., description="Number of analyses per day as {day, count}, oldest first"
+    )
+
+
+class JobResponse(BaseModel):
+    job_id: str = Field(..., description="Unique ID of the analysis job")
+    status: str = Field(
+        ..., description="Job status: 'queued', 'running', 'done' or 'failed'"
+    )
+    result: Optional[Dict[str, Any]] = Field(
+        None, description="Structured AI analysis results once the job is done"
+    )
+    error: Optional[str] = Field(None, description="Failure reason if the job failed")
+    attempts: Optional[int] = Field(
+        None, description="Number of times a worker picked up the job"
+    )
+    created_at: Optional[datetime] = Field(None, description="When the job was enqueued")
+    started_at: Optional[datetime] = Field(
+        None, description="When a worker last started the job"
+    )
+    finished_at: Optional[datetime] = Field(None, description="When the job finished")
+
+
+class LLMStatsResponse(BaseModel):
+    queue_depth: int = Field(..., description="LLM calls waiting for admission")
+    in_flight: int = Field(..., description="LLM calls currently running")
+    concurrency_limit: int = Field(
+        ..., description="Current adaptive limit on concurrent LLM calls"
+    )
+    avg_wait_seconds: float = Field(
+        ..., description="Average time calls spent queued before running"
+    )
+    max_wait_seconds: float = Field(
+        ..., description="Longest time a call spent queued before running"
+    )
+    completed: int = Field(..., description="LLM calls that succeeded")
+    failed: int = Field(..., description="LLM calls that failed after retries")
+    retries: int = Field(..., description="Retries performed after transient errors")
+    latency_ewma_seconds: Optional[float] = Field(
+        None, description="Moving average of LLM call latency"
+    )
+    tiers: Optional[Dict[str, Dict[str, Any]]] = Field(
+        None, description="Per-model (routing tier) call counts, usage and latency"
+    )
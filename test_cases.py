@@ -1,6 +1,11 @@
 import pytest
 from pydantic import ValidationError
 from models import AnalyzeResponse, SearchResponse  # adjust import path
+from models import LLMStatsResponse, JobResponse, StatsResponse
+from llm_models.llm import LLMScheduler, ModelRouter
+from helper_functions.tracing import request_trace, run_in_thread, span
+from data.article_store import InMemoryArticleStore
+from data.near_duplicate import NearDuplicateIndex
 
 
 def test_analyze_response_with_valid_data():
@@ -86,3 +91,623 @@ def test_search_response_not_found():
     assert response.status == "not_found"
     assert response.message == "No results available"
     assert response.results is None
+
+
+def test_llm_scheduler_retries_transient_errors():
+    """
+    Test that LLMScheduler retries a transient failure and then succeeds.
+    Ensures:
+    - the call result is returned
+    - the retry and completion are counted
+    - the stats fit the LLMStatsResponse model
+    """
+    import httpx
+    from openai import APIConnectionError
+
+    scheduler = LLMScheduler()
+    scheduler.backoff_base = 0.001
+    attempts = []
+
+    def flaky_call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise APIConnectionError(request=httpx.Request("POST", "http://llm"))
+        return "ok"
+
+    assert scheduler.run(flaky_call, tokens=10) == "ok"
+
+    stats = LLMStatsResponse(**scheduler.stats())
+    assert stats.retries == 1
+    assert stats.completed == 1
+    assert stats.queue_depth == 0
+    assert stats.in_flight == 0
+
+
+def test_model_router_routes_by_task_and_size(monkeypatch):
+    """
+    Test that ModelRouter picks the first matching rule and appends fallback tiers.
+    Ensures:
+    - short extraction inputs go to the small tier, falling back to larger ones
+    - inputs above every bounded rule go to the catch-all tier
+    """
+    monkeypatch.setenv(
+        "model_routes",
+        '[{"task": "extraction", "max_input_tokens": 100, "model": "small", "fallback": "mid"},'
+        ' {"max_input_tokens": 1000, "model": "mid", "fallback": "large"},'
+        ' {"model": "large", "timeout": 60}]',
+    )
+    router = ModelRouter(default_model="default")
+
+    assert [r.model for r in router.route("extraction", 50)] == ["small", "mid", "large"]
+    assert [r.model for r in router.route("summary", 50)] == ["mid", "large"]
+    assert [r.model for r in router.route("summary", 5000)] == ["large"]
+    assert router.route("summary", 50)[-1].timeout == 60
+
+
+def test_graph_executor_does_not_starve_short_calls():
+    """
+    Test that blocking graph runs on a dedicated executor leave the default one free.
+    Ensures a short call completes while every graph thread is busy waiting.
+    """
+    import asyncio
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    graph_executor = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+
+    async def scenario():
+        graph_run = asyncio.ensure_future(run_in_thread(release.wait, executor=graph_executor))
+        short_call = await asyncio.wait_for(run_in_thread(lambda: "state"), timeout=1)
+        release.set()
+        await graph_run
+        return short_call
+
+    assert asyncio.run(scenario()) == "state"
+    graph_executor.shutdown()
+
+
+def test_llm_fallback_records_model_latency_only(monkeypatch):
+    """
+    Test that a tier timeout falls back without throttling the scheduler.
+    Ensures:
+    - the call falls back to the next tier and returns its answer
+    - an expected fallback timeout leaves the concurrency limit unchanged
+    - tier latency covers only the model call; scheduler wait is recorded apart
+    """
+    import time
+    import httpx
+    from openai import APITimeoutError
+    from llm_models import llm as llm_module
+
+    monkeypatch.setenv("openai_api_key", "test")
+    monkeypatch.setenv("model_name", "large")
+    monkeypatch.setenv(
+        "model_routes", '[{"model": "small", "fallback": "large"}, {"model": "large"}]'
+    )
+    scheduler = LLMScheduler()
+    router = ModelRouter()
+    monkeypatch.setattr(llm_module, "llm_scheduler", scheduler)
+    monkeypatch.setattr(llm_module, "model_router", router)
+
+    class FakeLLM:
+        def __init__(self, model):
+            self.model = model
+
+        def invoke(self, prompt):
+            if self.model == "small":
+                raise APITimeoutError(request=httpx.Request("POST", "http://llm"))
+            return "answer"
+
+    handler = llm_module.LLMHandler()
+    monkeypatch.setattr(handler, "get_llm", lambda model, timeout: FakeLLM(model))
+
+    # Simulate a slow scheduler queue in front of every call
+    original_acquire = scheduler._acquire
+
+    def slow_acquire(tokens, priority):
+        time.sleep(0.05)
+        return original_acquire(tokens, priority)
+
+    monkeypatch.setattr(scheduler, "_acquire", slow_acquire)
+    limit_before = scheduler.stats()["concurrency_limit"]
+
+    assert handler.invoke("prompt") == "answer"
+
+    tiers = router.stats()
+    assert tiers["small"]["timeout"] == 1
+    assert tiers["large"]["success"] == 1
+    assert tiers["large"]["max_latency_seconds"] < 0.05
+    assert tiers["large"]["avg_queue_wait_seconds"] >= 0.05
+    assert scheduler.stats()["concurrency_limit"] >= limit_before
+
+
+def test_job_response_queued_and_done():
+    """
+    Test that JobResponse handles both a freshly queued job and a finished one.
+    Ensures:
+    - a queued job only needs job_id and status
+    - a finished job carries its result
+    """
+    queued = JobResponse(job_id="job-1", status="queued")
+    assert queued.result is None
+    assert queued.error is None
+
+    done = JobResponse(
+        job_id="job-1",
+        status="done",
+        result={"title": "AI in Fashion", "topics": ["AI"], "sentiment": "positive"},
+        attempts=1,
+    )
+    assert done.status == "done"
+    assert done.result["topics"] == ["AI"]
+
+
+class _FakeGraph:
+    """Stand-in for the compiled graph: returns canned results and state values."""
+
+    def __init__(self, values, interrupt=None, delay=0.0):
+        self.values = values
+        self.interrupt = interrupt
+        self.delay = delay
+        self.thread_ids = set()
+        self.checkpointer = type("Saver", (), {"deleted": []})()
+        self.checkpointer.delete_thread = self.checkpointer.deleted.append
+
+    def invoke(self, _input, config):
+        import time
+
+        self.thread_ids.add(config["configurable"]["thread_id"])
+        time.sleep(self.delay)
+        return {"__interrupt__": [self.interrupt]} if self.interrupt else {}
+
+    def get_state(self, _config):
+        return type("State", (), {"values": self.values})()
+
+
+class _StubPostgreSQL:
+    """Stand-in for PostgreSQL that records job outcomes instead of writing them."""
+
+    def __init__(self, claim_held=True):
+        self.claim_held = claim_held
+        self.completed = []
+        self.finished = []
+        self.renewals = []
+
+    async def renew_job_lease(self, job_id, attempts):
+        self.renewals.append((job_id, attempts))
+        return self.claim_held
+
+    async def complete_job(self, job_id, attempts, analysis, minhash=None):
+        if self.claim_held:
+            self.completed.append((job_id, attempts, analysis))
+        return self.claim_held
+
+    async def finish_job(self, job_id, attempts, status, result=None, error=None):
+        if self.claim_held:
+            self.finished.append((job_id, attempts, status, error))
+        return self.claim_held
+
+
+def _run_job(monkeypatch, graph, job, db):
+    import asyncio
+    from job_queue import job_worker
+
+    notified = []
+
+    async def fake_notify(self, job, status, result=None, error=None):
+        notified.append(status)
+
+    monkeypatch.setattr(job_worker, "PostgreSQL", lambda: db)
+    monkeypatch.setattr(job_worker.JobWorker, "_notify", fake_notify)
+    worker = job_worker.JobWorker(graph=graph, concurrency=1)
+    worker.max_attempts = 3
+    worker.lease_seconds = 0.03
+    asyncio.run(worker.run_job(job))
+    return notified
+
+
+def test_job_worker_run_job_outcomes(monkeypatch):
+    """
+    Test JobWorker.run_job with a fake graph and a stub database.
+    Ensures:
+    - a completed analysis is saved under the job's claim and notified as done
+    - an interrupted analysis marks the job failed with the interrupt message and notifies it
+    - a job past max attempts fails without running the graph
+    - a worker that lost its claim saves nothing and sends no callback
+    """
+    job = {"job_id": "job-1", "user_input": "text", "callback_url": None, "attempts": 1}
+    values = {
+        "title": "AI in Fashion",
+        "topics": ["AI"],
+        "sentiment": "positive",
+        "summary": "Summary",
+        "keywords": ["ai"],
+    }
+
+    db = _StubPostgreSQL()
+    assert _run_job(monkeypatch, _FakeGraph(values), job, db) == ["done"]
+    assert db.completed == [("job-1", 1, values)]
+    assert db.finished == []
+
+    db = _StubPostgreSQL()
+    interrupted = _FakeGraph({}, interrupt=type("I", (), {"value": "❌ Empty input"})())
+    assert _run_job(monkeypatch, interrupted, job, db) == ["failed"]
+    assert db.finished == [("job-1", 1, "failed", "❌ Empty input")]
+
+    db = _StubPostgreSQL()
+    _run_job(monkeypatch, _FakeGraph(values), {**job, "attempts": 4}, db)
+    assert db.completed == []
+    assert db.finished[0][2] == "failed"
+
+    db = _StubPostgreSQL(claim_held=False)
+    assert _run_job(monkeypatch, _FakeGraph(values), job, db) == []
+    assert db.completed == [] and db.finished == []
+
+
+def test_job_worker_heartbeat_and_thread_cleanup(monkeypatch):
+    """
+    Test that a slow job keeps its lease and leaves nothing behind.
+    Ensures:
+    - the lease is renewed under the job's claim token while the graph runs
+    - the graph thread is per claim and deleted afterwards
+    - the article is released from the in-memory store
+    """
+    from job_queue import job_worker
+
+    job = {"job_id": "job-2", "user_input": "slow text", "callback_url": None, "attempts": 2}
+    values = {"topics": ["AI"], "sentiment": "neutral", "summary": "S", "keywords": ["ai"]}
+    graph = _FakeGraph(values, delay=0.05)
+    db = _StubPostgreSQL()
+    store = InMemoryArticleStore()
+    monkeypatch.setattr(job_worker, "article_store", store)
+
+    assert _run_job(monkeypatch, graph, job, db) == ["done"]
+    assert db.renewals and set(db.renewals) == {("job-2", 2)}
+    assert graph.thread_ids == {"job-2:2"}
+    assert graph.checkpointer.deleted == ["job-2:2"]
+    assert store._articles == {}
+
+
+def test_job_callback_url_requires_allowed_host(monkeypatch):
+    """
+    Test that job callbacks are limited to allowlisted http(s) hosts.
+    Ensures:
+    - callbacks are rejected while the allowlist is empty
+    - allowlisted hosts are accepted, other hosts and schemes are rejected
+    """
+    from data_validator.data_valid import JobRequest
+
+    monkeypatch.delenv("job_callback_allowed_hosts", raising=False)
+    with pytest.raises(ValidationError):
+        JobRequest(user_input="text", callback_url="http://localhost:9000/done")
+
+    monkeypatch.setenv("job_callback_allowed_hosts", "localhost")
+    request = JobRequest(user_input="text", callback_url="http://localhost:9000/done")
+    assert str(request.callback_url) == "http://localhost:9000/done"
+    for url in ["http://169.254.169.254/latest/meta-data", "file:///etc/passwd"]:
+        with pytest.raises(ValidationError):
+            JobRequest(user_input="text", callback_url=url)
+
+
+def test_stats_response_with_aggregates():
+    """
+    Test that StatsResponse parses aggregate rows.
+    Ensures:
+    - top topics keep their order
+    - sentiment distribution is keyed by topic
+    """
+    data = {
+        "top_topics": [{"topic": "ai", "count": 5}, {"topic": "fashion", "count": 2}],
+        "top_keywords": [{"keyword": "retail", "count": 3}],
+        "sentiment_by_topic": {"ai": {"positive": 4, "negative": 1}},
+        "daily_volume": [{"day": "2025-09-01", "count": 7}],
+    }
+    response = StatsResponse(**data)
+
+    assert response.top_topics[0]["topic"] == "ai"
+    assert response.sentiment_by_topic["ai"]["positive"] == 4
+    assert response.daily_volume[0]["count"] == 7
+
+
+class _FakeConnection:
+    """Stand-in for an asyncpg connection: canned fetch results, recorded executes."""
+
+    def __init__(self, fetch_results=None, fail_on=None):
+        self.fetch_results = fetch_results or {}
+        self.fail_on = fail_on
+        self.executed = []
+
+    async def fetch(self, query, *args):
+        for table, rows in self.fetch_results.items():
+            if f"FROM {table}" in query:
+                return rows
+        return []
+
+    async def fetchrow(self, query, *args):
+        return {"session_id": args[0]}
+
+    async def execute(self, query, *args):
+        if self.fail_on and self.fail_on in query:
+            raise RuntimeError(f"relation \"{self.fail_on}\" does not exist")
+        self.executed.append(query)
+
+    def transaction(self):
+        class _Transaction:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Transaction()
+
+
+def _postgresql_with(connection):
+    from data.postgres_db import PostgreSQL
+
+    postgresql = PostgreSQL()
+
+    async def connect():
+        postgresql.connection = connection
+
+    async def close():
+        pass
+
+    postgresql.connect = connect
+    postgresql.close = close
+    return postgresql
+
+
+def test_get_stats_folds_sentiment_rows_by_topic():
+    """
+    Test that PostgreSQL.get_stats groups sentiment rows under their topic.
+    Ensures:
+    - each top topic maps to its per-sentiment counts
+    - the result fits the StatsResponse model
+    """
+    import asyncio
+
+    connection = _FakeConnection(
+        {
+            "topic_counts": [{"topic": "ai", "count": 5}, {"topic": "fashion", "count": 2}],
+            "keyword_counts": [{"keyword": "retail", "count": 4}],
+            "topic_sentiment_counts": [
+                {"topic": "ai", "sentiment": "positive", "count": 4},
+                {"topic": "ai", "sentiment": "negative", "count": 1},
+                {"topic": "fashion", "sentiment": "neutral", "count": 2},
+            ],
+            "daily_counts": [{"day": "2025-01-01", "count": 7}],
+        }
+    )
+    stats = asyncio.run(_postgresql_with(connection).get_stats(top_n=2, days=7))
+
+    assert stats["sentiment_by_topic"] == {
+        "ai": {"positive": 4, "negative": 1},
+        "fashion": {"neutral": 2},
+    }
+    assert StatsResponse(**stats).top_topics[0]["topic"] == "ai"
+
+
+def test_stats_failure_keeps_analysis_row():
+    """
+    Test that a failing stats update does not lose the analysis being stored.
+    Ensures:
+    - insert_blog_details still returns the session_id
+    - the near-duplicate signature is still written
+    """
+    import asyncio
+
+    connection = _FakeConnection(fail_on="daily_counts")
+    session_id = asyncio.run(
+        _postgresql_with(connection).insert_blog_details(
+            "session-1", "Title", ["AI"], "positive", "Summary", ["ai"], minhash=b"sig"
+        )
+    )
+
+    assert session_id == "session-1"
+    assert any("article_minhash" in query for query in connection.executed)
+
+
+def test_request_trace_collects_spans_only_when_enabled():
+    """
+    Test that spans are recorded inside a traced request and ignored otherwise.
+    Ensures:
+    - a traced request records named spans with timings
+    - an untraced request yields no trace
+    """
+    with request_trace("test", trace=True) as trace:
+        with span("node.example", detail="x"):
+            pass
+
+    spans = trace.to_dict()["spans"]
+    assert [s["name"] for s in spans] == ["node.example"]
+    assert spans[0]["detail"] == "x"
+    assert spans[0]["duration_ms"] >= 0
+
+    with request_trace("test") as trace:
+        with span("node.example"):
+            pass
+    assert trace is None
+
+
+def test_in_memory_article_store_is_content_addressed():
+    """
+    Test that InMemoryArticleStore stores identical articles once.
+    Ensures:
+    - the same text always maps to the same reference
+    - the text is returned by reference
+    - empty or unknown references load as an empty string
+    """
+    store = InMemoryArticleStore()
+    ref = store.put("AI is reshaping fashion retail.")
+
+    assert store.put("AI is reshaping fashion retail.") == ref
+    assert store.get(ref) == "AI is reshaping fashion retail."
+    assert store.get(None) == ""
+    assert store.get("unknown") == ""
+
+
+def test_near_duplicate_index_matches_edited_copies_only():
+    """
+    Test that NearDuplicateIndex finds lightly edited copies of an indexed article.
+    Ensures:
+    - a copy with a new byline and footer matches the original session
+    - an unrelated article does not match
+    """
+    index = NearDuplicateIndex(threshold=0.8, persist=False)
+    article = " ".join(f"word{i % 97} term{i % 89}" for i in range(400))
+    unrelated = " ".join(f"other{i % 83} token{i % 79}" for i in range(400))
+    index.add("original", index.hasher.signature(article))
+
+    match = index.query(index.hasher.signature("By Jane Doe. " + article + " Read more online."))
+    assert match is not None
+    assert match[0] == "original"
+    assert match[1] >= 0.8
+
+    assert index.query(index.hasher.signature(unrelated)) is None
+
+
+def test_near_duplicate_index_replaces_and_evicts():
+    """
+    Test that NearDuplicateIndex keeps its LSH buckets consistent.
+    Ensures:
+    - re-adding a key with a new signature drops its old bucket entries
+    - past max_documents the oldest document is evicted and its slot reused
+    """
+    index = NearDuplicateIndex(threshold=0.8, max_documents=2, persist=False)
+    first = index.hasher.signature(" ".join(f"alpha{i % 97} beta{i % 89}" for i in range(400)))
+    second = index.hasher.signature(" ".join(f"gamma{i % 83} delta{i % 79}" for i in range(400)))
+    third = index.hasher.signature(" ".join(f"eps{i % 73} zeta{i % 71}" for i in range(400)))
+
+    index.add("a", first)
+    index.add("a", second)
+    assert index.query(first) is None
+    assert index.query(second)[0] == "a"
+    assert sum(len(bucket) for bucket in index._buckets) == index.bands
+
+    index.add("b", first)
+    index.add("c", third)
+    assert len(index) == 2
+    assert index.query(second) is None
+    assert index.query(first)[0] == "b"
+    assert index.query(third)[0] == "c"
+
+
+def test_near_duplicate_refresh_skips_bad_signatures_and_query_stays_local(monkeypatch):
+    """
+    Test that NearDuplicateIndex.refresh tolerates signatures of another num_perm.
+    Ensures:
+    - rows whose signature length does not match num_perm are skipped
+    - the index is marked refreshed and advances its cursor
+    - query() answers from memory without touching the database
+    """
+    import data.near_duplicate as near_duplicate
+
+    index = NearDuplicateIndex(threshold=0.8, persist=True)
+    article = index.hasher.signature(" ".join(f"alpha{i % 97} beta{i % 89}" for i in range(400)))
+    calls = []
+
+    class StubPostgreSQL:
+        async def get_minhashes(self, since_txid, limit):
+            calls.append((since_txid, limit))
+            rows = [
+                {"session_id": "good", "signature": article},
+                {"session_id": "stale", "signature": article[:64]},
+            ]
+            return rows, 42
+
+    monkeypatch.setattr(near_duplicate, "PostgreSQL", StubPostgreSQL)
+
+    index.refresh()
+    assert index.refreshed
+    assert len(index) == 1
+    assert calls == [(None, index.max_documents)]
+
+    assert index.query(article)[0] == "good"
+    assert len(calls) == 1
+
+
+def test_run_in_thread_keeps_trace_and_profiles_worker_thread():
+    """
+    Test that blocking work moved off the event loop stays part of the request.
+    Ensures:
+    - spans recorded in the worker thread join the request's trace
+    - the profiler samples the worker thread
+    - the event loop keeps running while the worker blocks
+    """
+    import asyncio
+    import time
+
+    def blocking_node():
+        with span("node.blocking"):
+            time.sleep(0.1)
+        return "done"
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker_task = asyncio.create_task(ticker())
+        with request_trace("test", trace=True, profile=True) as trace:
+            result = await run_in_thread(blocking_node)
+        ticker_task.cancel()
+        return result, trace, ticks
+
+    result, trace, ticks = asyncio.run(scenario())
+
+    assert result == "done"
+    assert [s["name"] for s in trace.spans] == ["node.blocking"]
+    assert any("blocking_node" in f["function"] for f in trace.profile["top_self"])
+    # Only the worker thread is sampled, not the idle event loop
+    assert not any("selectors" in f["function"] for f in trace.profile["top_inclusive"])
+    assert ticks >= 5
+
+
+def test_postgres_article_store_does_not_cache_misses(monkeypatch):
+    """
+    Test that PostgresArticleStore caches found articles but not misses.
+    Ensures:
+    - a reference that is unknown at first is found once the article is stored
+    - a found article is served from the cache afterwards
+    """
+    from data import article_store as store_module
+
+    rows = {}
+    lookups = []
+
+    class FakePostgreSQL:
+        async def get_article(self, ref):
+            lookups.append(ref)
+            return rows.get(ref)
+
+    monkeypatch.setattr(store_module, "PostgreSQL", FakePostgreSQL)
+    store = store_module.PostgresArticleStore()
+    store._table_ready = True
+
+    assert store.get("ref-1") == ""
+    rows["ref-1"] = "Late article"
+    assert store.get("ref-1") == "Late article"
+    assert store.get("ref-1") == "Late article"
+    assert lookups == ["ref-1", "ref-1"]
+
+
+def test_storage_modules_do_not_load_psycopg():
+    """
+    Test that importing the article store and near-duplicate index does not pull in psycopg.
+    Ensures the default deployment only needs the asyncpg driver.
+    """
+    import subprocess
+    import sys
+
+    modules = ["data.article_store", "data.near_duplicate"]
+    code = (
+        f"import sys; import {', '.join(modules)}; "
+        "sys.exit('psycopg' in sys.modules)"
+    )
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 0